@@ -1,5 +1,7 @@
 import streamlit as st
 
+from src.data_loader import load_survey_aggregates
+
 st.set_page_config(
     page_title="Análisis Estadístico",
     page_icon="📊",
@@ -55,8 +57,10 @@ Selecciona una sección del menú lateral para comenzar tu análisis.
 
 # Información del dataset
 st.sidebar.header("ℹ️ Información")
-st.sidebar.markdown("""
-- Total de encuestados: 30
+# Los agregados persistentes se mantienen al día al agregar respuestas
+agregados = load_survey_aggregates()
+st.sidebar.markdown(f"""
+- Total de encuestados: {agregados.rows}
 - Variables analizadas: 11
 - Última actualización: 2024
 - Enfoque: Satisfacción del cliente
@@ -0,0 +1,308 @@
+"""
+Benchmark de cobertura de los intervalos de confianza de la página de
+Análisis Inferencial.
+
+Genera poblaciones sintéticas, simula millones de intervalos por método con
+las mismas funciones de src.confidence que usan las pestañas de intervalos
+y reporta la cobertura empírica, el ancho medio y el rendimiento
+(intervalos por segundo). Se ejecuta sin interfaz:
+
+    python benchmarks/ci_coverage.py --intervals 1000000 --output cobertura.json
+    python benchmarks/ci_coverage.py --compare cobertura.json
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import math
+import platform
+import subprocess
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from src import confidence as ci
+
+# Elementos por lote (intervalos × tamaño de muestra × muestras) para acotar
+# la memoria de cada tarea del pool
+CHUNK_ELEMENTS = 1 << 23
+INTERVALS = 1_000_000
+SAMPLE_SIZES = (15, 30, 100)
+# Proporciones poblacionales de los dos grupos, cercanas a la tasa de
+# satisfacción alta de la encuesta
+PROPORTIONS = (0.8, 0.7)
+# Diferencia admitida entre la cobertura empírica y la nominal
+TOLERANCE = 0.01
+
+
+def _normal(rng, shape):
+    return rng.normal(25.0, 4.0, shape)
+
+
+def _exponential(rng, shape):
+    return rng.exponential(2.0, shape)
+
+
+def _uniform(rng, shape):
+    return rng.uniform(1.0, 5.0, shape)
+
+
+# Poblaciones continuas: generador, media y varianza verdaderas
+POPULATIONS = {
+    'normal': (_normal, 25.0, 16.0),
+    'exponential': (_exponential, 2.0, 4.0),
+    'uniform': (_uniform, 3.0, 16.0 / 12),
+}
+
+
+def _sample(rng, population, n, size):
+    """
+    Media y varianza muestral de `size` muestras de tamaño n
+    """
+    sample = POPULATIONS[population][0](rng, (size, n))
+    return sample.mean(axis=1), sample.var(axis=1, ddof=1)
+
+
+def _z_mean(rng, population, n, size, confidence):
+    _, mu, var = POPULATIONS[population]
+    mean, _ = _sample(rng, population, n, size)
+    return ci.z_mean(mean, np.sqrt(var), n, confidence), mu
+
+
+def _t_mean(rng, population, n, size, confidence):
+    mean, var = _sample(rng, population, n, size)
+    return ci.t_mean(mean, np.sqrt(var), n, confidence), POPULATIONS[population][1]
+
+
+def _mean_difference(rng, population, n, size, confidence):
+    sigma = np.sqrt(POPULATIONS[population][2])
+    mean1, _ = _sample(rng, population, n, size)
+    mean2, _ = _sample(rng, population, n, size)
+    return ci.mean_difference(mean1, sigma, n, mean2, sigma, n, confidence), 0.0
+
+
+def _welch(rng, population, n, size, confidence):
+    mean1, var1 = _sample(rng, population, n, size)
+    mean2, var2 = _sample(rng, population, n, size)
+    return ci.mean_difference(mean1, np.sqrt(var1), n, mean2, np.sqrt(var2), n,
+                              confidence, known_variance=False), 0.0
+
+
+def _proportion(rng, population, n, size, confidence):
+    p = rng.binomial(n, PROPORTIONS[0], size) / n
+    return ci.proportion(p, n, confidence), PROPORTIONS[0]
+
+
+def _proportion_difference(rng, population, n, size, confidence):
+    p1 = rng.binomial(n, PROPORTIONS[0], size) / n
+    p2 = rng.binomial(n, PROPORTIONS[1], size) / n
+    return ci.proportion_difference(p1, n, p2, n, confidence), PROPORTIONS[0] - PROPORTIONS[1]
+
+
+def _variance(rng, population, n, size, confidence):
+    _, var = _sample(rng, population, n, size)
+    return ci.variance(var, n, confidence), POPULATIONS[population][2]
+
+
+# Método → (función, número de muestras por intervalo, usa población
+# continua). Corresponden a las pestañas a), b), c), f), g) y h) de
+# intervalos y a las diferencias de Welch de la tabla de intervalos.
+METHODS = {
+    'z_mean': (_z_mean, 1, True),
+    't_mean': (_t_mean, 1, True),
+    'mean_difference': (_mean_difference, 2, True),
+    'welch': (_welch, 2, True),
+    'proportion': (_proportion, 1, False),
+    'proportion_difference': (_proportion_difference, 2, False),
+    'variance': (_variance, 1, True),
+}
+
+
+def _run_batch(method, population, n, confidence, seed, size):
+    """
+    Simular un lote de intervalos y devolver cuántos cubren el parámetro,
+    la suma de sus anchos, el tamaño del lote y el tiempo de cómputo
+    """
+    start = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    (lower, upper), true = METHODS[method][0](rng, population, n, size, confidence)
+    covered = int(np.count_nonzero((lower <= true) & (true <= upper)))
+    width = float(np.sum(upper - lower))
+    return covered, width, size, time.perf_counter() - start
+
+
+def _cells(methods, populations, sizes):
+    for method in methods:
+        _, _, continuous = METHODS[method]
+        for population in (populations if continuous else ['bernoulli']):
+            for n in sizes:
+                yield method, population, n
+
+
+def run(methods=tuple(METHODS), populations=tuple(POPULATIONS), sizes=SAMPLE_SIZES,
+        intervals=INTERVALS, confidence=0.95, seed=0, workers=None, tolerance=TOLERANCE):
+    """
+    Ejecutar el benchmark y devolver el resumen como diccionario.
+
+    Cada combinación (método, población, n) se divide en lotes con su
+    propia semilla derivada de `seed` y de la combinación; los lotes de todas las combinaciones
+    se reparten en `workers` procesos, por lo que los resultados no
+    dependen del número de procesos.
+    """
+    for method in methods:
+        if method not in METHODS:
+            raise ValueError(f"Método desconocido: '{method}'")
+    for population in populations:
+        if population not in POPULATIONS:
+            raise ValueError(f"Población desconocida: '{population}'")
+
+    cells = list(_cells(methods, populations, sizes))
+    tasks = []
+    for index, (method, population, n) in enumerate(cells):
+        # La semilla depende de la combinación y no de su posición, así que
+        # una corrida parcial reproduce las mismas filas que la completa
+        cell_seed = np.random.SeedSequence([seed, zlib.crc32(f'{method}/{population}/{n}'.encode())])
+        size = max(1, CHUNK_ELEMENTS // (n * METHODS[method][1]))
+        n_batches = math.ceil(intervals / size)
+        for batch, batch_seed in enumerate(cell_seed.spawn(n_batches)):
+            tasks.append((index, method, population, n, confidence, batch_seed,
+                          min(size, intervals - batch * size)))
+
+    workers = workers or os.cpu_count() or 1
+    totals = np.zeros((len(cells), 4))
+    start = time.perf_counter()
+    if workers == 1:
+        for task in tasks:
+            totals[task[0]] += _run_batch(*task[1:])
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            results = pool.map(_run_batch, *zip(*(task[1:] for task in tasks)))
+            for task, result in zip(tasks, results):
+                totals[task[0]] += result
+    elapsed = time.perf_counter() - start
+
+    rows = []
+    for (method, population, n), (covered, width, count, seconds) in zip(cells, totals.tolist()):
+        coverage = covered / count
+        mc_error = math.sqrt(coverage * (1 - coverage) / count)
+        rows.append({
+            'method': method,
+            'population': population,
+            'n': n,
+            'confidence': confidence,
+            'intervals': int(count),
+            'coverage': coverage,
+            'mc_error': mc_error,
+            'mean_width': width / count,
+            'within_tolerance': bool(abs(coverage - confidence) <= tolerance + 3 * mc_error),
+            'seconds': seconds,
+            'intervals_per_second': count / seconds if seconds > 0 else None,
+        })
+
+    total = int(totals[:, 2].sum())
+    return {
+        'benchmark': 'ci_coverage',
+        'version': _version(),
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'workers': workers,
+        },
+        'settings': {
+            'intervals': intervals,
+            'sizes': list(sizes),
+            'confidence': confidence,
+            'seed': seed,
+            'tolerance': tolerance,
+            'proportions': list(PROPORTIONS),
+        },
+        'results': rows,
+        'total': {
+            'intervals': total,
+            'wall_seconds': elapsed,
+            'intervals_per_second': total / elapsed if elapsed > 0 else None,
+        },
+    }
+
+
+def _version():
+    """
+    Commit actual del repositorio, si está disponible
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _key(row):
+    return row['method'], row['population'], row['n'], row['confidence']
+
+
+def print_summary(summary, previous=None):
+    """
+    Tabla de resultados; con un resumen anterior agrega la diferencia de
+    cobertura y la razón de rendimiento
+    """
+    before = {_key(row): row for row in previous['results']} if previous else {}
+    header = f"{'Método':<22}{'Población':<13}{'n':>5}{'Cobertura':>11}{'± EMC':>9}{'Ancho':>11}{'Int./s':>13}"
+    if previous:
+        header += f"{'Δ cob.':>9}{'× vel.':>8}"
+    print(header)
+    for row in summary['results']:
+        line = (f"{row['method']:<22}{row['population']:<13}{row['n']:>5}"
+                f"{row['coverage']:>11.4f}{row['mc_error']:>9.4f}{row['mean_width']:>11.4f}"
+                f"{row['intervals_per_second'] or 0:>13,.0f}")
+        old = before.get(_key(row))
+        if old is not None:
+            speedup = (row['intervals_per_second'] or 0) / (old['intervals_per_second'] or float('inf'))
+            line += f"{row['coverage'] - old['coverage']:>+9.4f}{speedup:>8.2f}"
+        if not row['within_tolerance']:
+            line += "  ⚠"
+        print(line)
+    total = summary['total']
+    print(f"\nTotal: {total['intervals']:,} intervalos en {total['wall_seconds']:.2f} s "
+          f"({total['intervals_per_second'] or 0:,.0f} intervalos/s)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cobertura empírica de los intervalos de confianza")
+    parser.add_argument('--intervals', type=int, default=INTERVALS, help="intervalos por combinación")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SAMPLE_SIZES))
+    parser.add_argument('--confidence', type=float, default=0.95)
+    parser.add_argument('--methods', nargs='+', default=list(METHODS), choices=list(METHODS))
+    parser.add_argument('--populations', nargs='+', default=list(POPULATIONS), choices=list(POPULATIONS))
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE)
+    parser.add_argument('--output', help="archivo JSON donde guardar el resumen")
+    parser.add_argument('--compare', help="resumen JSON de una versión anterior")
+    parser.add_argument('--strict', action='store_true',
+                        help="terminar con error si alguna cobertura sale de la tolerancia")
+    args = parser.parse_args(argv)
+
+    summary = run(args.methods, args.populations, args.sizes, args.intervals, args.confidence,
+                  args.seed, args.workers, args.tolerance)
+    previous = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            previous = json.load(f)
+    print_summary(summary, previous)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+
+    if args.strict and not all(row['within_tolerance'] for row in summary['results']):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,13 +7,11 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 from src.visualizations import StatisticalVisualizer
 from src.analysis import StatisticalAnalyzer
+from src.data_loader import load_survey
 
 def cargar_datos():
     """Cargar y preparar los datos de la encuesta"""
-    ruta_base = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    ruta_datos = os.path.join(ruta_base, 'data', 'encuesta_recreacion.csv')
-    df = pd.read_csv(ruta_datos)
-    return df
+    return load_survey('encuesta_recreacion.csv')
 
 def analisis_demografico(df, visualizer):
     """Análisis demográfico básico"""
@@ -2,20 +2,14 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import numpy as np
-from pathlib import Path
+from src.data_loader import load_survey, memory_report
+from src.encoding import load_codebook
 
 # Configuración de la página
 st.set_page_config(page_title="Análisis Descriptivo", page_icon="📈", layout="wide")
 
-# Función para cargar datos
-@st.cache_data
-def cargar_datos():
-    ruta_base = Path(__file__).parent.parent
-    ruta_datos = ruta_base / 'data' / 'encuesta_recreacion.csv'
-    return pd.read_csv(ruta_datos)
-
 # Cargar datos
-df = cargar_datos()
+df = load_survey('encuesta_recreacion.csv')
 
 # Título de la página
 st.title("📈 Análisis Descriptivo")
@@ -191,15 +185,9 @@ with tab2:
 with tab3:
     st.header("2.5 Medidas de Tendencia Central y Dispersión")
     
-    # Convertir frecuencia de visitas a numérico
-    frecuencia_map = {
-        '1 vez': 1,
-        '2-3 veces': 2.5,
-        '4-5 veces': 4.5,
-        'Más de 5 veces': 6
-    }
+    # Convertir frecuencia de visitas a numérico según el libro de códigos
     df_num = df.copy()
-    df_num['Frecuencia de Visitas (Numérico)'] = df_num['Frecuencia de Visitas'].map(frecuencia_map)
+    df_num['Frecuencia de Visitas (Numérico)'] = load_codebook().numeric_values(df, 'Frecuencia de Visitas')
     
     # Seleccionar variables numéricas/ordinales para análisis
     variables_numericas = ["Preferencia", "Frecuencia de Visitas (Numérico)"]
@@ -273,6 +261,12 @@ with st.sidebar:
     st.write(f"**Total de encuestados:** {len(df)}")
     st.write(f"**Número de variables:** {len(df.columns)}")
     
+    with st.expander("💾 Uso de memoria"):
+        reporte_memoria = memory_report(df)
+        st.dataframe(reporte_memoria)
+        st.write(f"**Total:** {reporte_memoria['bytes'].sum():,} bytes "
+                 f"({reporte_memoria['default_bytes'].sum():,} con tipos por defecto)")
+    
     st.markdown("---")
     st.markdown("""
     ### 📝 Notas:
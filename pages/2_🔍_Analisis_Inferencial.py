@@ -4,7 +4,11 @@ import numpy as np
 from scipy import stats
 import plotly.express as px
 import plotly.graph_objects as go
-from pathlib import Path
+from src import confidence as ci
+from src.analysis import StatisticalAnalyzer
+from src.critical_values import chi2_ppf, norm_ppf, t_ppf
+from src.data_loader import SATISFACCION_ALTA, load_numeric_survey, load_survey_aggregates
+from src.simulation import simulate
 
 def latex_copyable(formula, label):
     """Muestra una fórmula LaTeX con un botón para copiar."""
@@ -35,20 +39,122 @@ function copyToClipboard(text) {
 </script>
 """, unsafe_allow_html=True)
 
-# Función para cargar datos
-@st.cache_data(ttl=0)  # ttl=0 significa que el caché se invalida en cada recarga
-def cargar_datos():
-    ruta_base = Path(__file__).parent.parent
-    ruta_datos = ruta_base / 'data' / 'encuesta_recreacion_numerica.csv'
-    df = pd.read_csv(ruta_datos)
-    # Asegurarnos que Genero sea tipo int
-    df['Genero'] = df['Genero'].astype(int)
-    # Asegurarnos que Importancia_Costo sea tipo int
-    df['Importancia_Costo'] = df['Importancia_Costo'].astype(int)
-    return df
-
 # Cargar datos
-df = cargar_datos()
+df = load_numeric_survey()
+
+# Estadísticos suficientes precalculados (n, sumas, medias y varianzas por
+# columna y por grupo): los cálculos no dependen del número de filas
+agregados = load_survey_aggregates()
+
+# Bandas de edad para estratificar (derivadas del dataset numérico)
+BANDAS_EDAD = [0, 20, 25, 30, np.inf]
+ETIQUETAS_EDAD = ['≤20', '21–25', '26–30', '>30']
+
+
+def intervalos_por_estrato(variable, metodo, nivel_conf, key, sigma=None):
+    """Muestra el intervalo de confianza de cada nivel de una variable de agrupación como forest plot; sigma es la σ conocida de 'z_mean'."""
+    estrato = st.selectbox(
+        "Estratificar por",
+        options=["Genero", "Importancia_Costo", "Banda de edad"],
+        key=f"estrato_{key}"
+    )
+    if estrato == "Banda de edad":
+        # Los agregados no incluyen la banda de edad: se agrupa el DataFrame
+        datos = df.assign(
+            Banda_Edad=pd.cut(df['Edad'], BANDAS_EDAD, labels=ETIQUETAS_EDAD),
+            Satisfaccion_Alta=(df['Satisfaccion'] >= SATISFACCION_ALTA).astype(float)
+        )
+        por = 'Banda_Edad'
+    else:
+        datos, por = agregados, estrato
+    
+    tabla = (StatisticalAnalyzer().stratified_intervals(datos, variable, por, metodo, nivel_conf, sigma)
+             .to_pandas().set_index('group').rename_axis(por))
+    etiquetas = [str(nivel) for nivel in tabla.index]
+    total = tabla.loc['Total']
+    
+    # Forest plot: un intervalo por nivel y el total como rombo
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=tabla['estimate'],
+        y=etiquetas,
+        mode='markers',
+        marker=dict(
+            symbol=['square'] * (len(tabla) - 1) + ['diamond'],
+            size=[10] * (len(tabla) - 1) + [14],
+            color=['blue'] * (len(tabla) - 1) + ['red']
+        ),
+        error_x=dict(
+            type='data',
+            symmetric=False,
+            array=tabla['upper'] - tabla['estimate'],
+            arrayminus=tabla['estimate'] - tabla['lower']
+        ),
+        customdata=np.column_stack([tabla['n'], tabla['lower'], tabla['upper']]),
+        hovertemplate='n = %{customdata[0]}<br>Estimación: %{x:.4f}<br>'
+                      'IC: (%{customdata[1]:.4f}, %{customdata[2]:.4f})<extra></extra>'
+    ))
+    fig.add_vline(x=total['estimate'], line_dash="dash", line_color="red")
+    fig.update_layout(
+        title=f"Intervalos de Confianza {nivel_conf:.0%} de {variable} por {estrato}",
+        xaxis_title=variable,
+        yaxis=dict(title=estrato, autorange="reversed"),
+        showlegend=False
+    )
+    st.plotly_chart(fig, key=f"forest_{key}")
+    st.dataframe(tabla.rename(columns={
+        'estimate': 'Estimación', 'lower': 'Límite inferior', 'upper': 'Límite superior'
+    }))
+
+
+def simulacion_muestral(poblacion, estadistico, tamanos, referencias, key):
+    """Simula la distribución muestral por Monte Carlo y superpone su histograma a la curva normal teórica."""
+    replicas = st.select_slider(
+        "Número de réplicas",
+        options=[10_000, 100_000, 1_000_000],
+        value=100_000,
+        key=f"replicas_{key}"
+    )
+    resultado = simulate(poblacion, estadistico, tamanos, replicas)
+    densidad, bordes = resultado.histogram(60)
+    
+    # Histograma empírico (densidad) y curva normal con los parámetros teóricos
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=(bordes[:-1] + bordes[1:]) / 2,
+        y=densidad,
+        width=np.diff(bordes),
+        marker_color='rgba(0,0,255,0.35)',
+        name='Simulación'
+    ))
+    x = np.linspace(bordes[0], bordes[-1], 200)
+    fig.add_trace(go.Scatter(
+        x=x,
+        y=stats.norm.pdf(x, resultado.expected, resultado.std_error),
+        mode='lines',
+        line=dict(color='red'),
+        name='Normal teórica'
+    ))
+    for etiqueta, valor in referencias.items():
+        fig.add_vline(x=valor, line_dash="dash", line_color="green", annotation_text=etiqueta)
+    fig.update_layout(
+        title=f"Distribución muestral simulada ({len(resultado):,} réplicas)",
+        xaxis_title="Estadístico",
+        yaxis_title="Densidad",
+        bargap=0
+    )
+    st.plotly_chart(fig, key=f"simulacion_{key}")
+    
+    # Comparación entre la simulación y la aproximación normal
+    filas = {
+        'Media': (resultado.mean, resultado.expected),
+        'Error estándar': (resultado.std, resultado.std_error),
+    }
+    for valor in referencias.values():
+        z = (valor - resultado.expected) / resultado.std_error
+        filas[f'P(estadístico > {valor:.4g})'] = (resultado.prob_greater(valor), 1 - stats.norm.cdf(z))
+        filas[f'P(estadístico < {valor:.4g})'] = (resultado.prob_less(valor), stats.norm.cdf(z))
+    st.dataframe(pd.DataFrame.from_dict(filas, orient='index', columns=['Simulación', 'Teórica']))
 
 # Título principal
 st.title("🔍 Análisis Inferencial")
@@ -83,10 +189,10 @@ with tab1:
         )
         
         # Calcular estadísticos
-        datos_variable = df[variable].dropna()
-        n = len(datos_variable)
-        media = datos_variable.mean()
-        std = datos_variable.std()
+        resumen = agregados.summary(variable)
+        n = resumen['n']
+        media = resumen['mean']
+        std = resumen['std']
         
         # Planteamiento del problema
         st.write(f"""
@@ -165,6 +271,12 @@ with tab1:
         mostrando qué tan probable es obtener valores alejados de la media en futuras muestras.
         """)
 
+        with st.expander("Simulación Monte Carlo de la distribución muestral"):
+            simulacion_muestral(
+                df[variable].to_numpy(), 'mean', n,
+                {"Valor 1": valor1, "Valor 2": valor2}, key="media_normal"
+            )
+
     # b) Media con Varianza Desconocida (t-Student)
     with dist_tabs[1]:
         st.subheader("b) Distribución Muestral para la Media con Varianza Desconocida")
@@ -202,8 +314,8 @@ with tab1:
         
         # Verificar datos antes de procesar
         st.write("### Verificación de Grupos")
-        datos_variable = df[variable].dropna()
-        n = len(datos_variable)
+        resumen = agregados.summary(variable)
+        n = resumen['n']
         
         if n < 2:
             st.error(f"""
@@ -213,8 +325,8 @@ with tab1:
             st.stop()
         
         # Calcular estadísticos reales
-        media = datos_variable.mean()
-        std = datos_variable.std()
+        media = resumen['mean']
+        std = resumen['std']
         gl = n - 1  # Grados de libertad
         
         # Mostrar información de la muestra
@@ -262,8 +374,8 @@ with tab1:
         t_stat = (media - valor)/(std/np.sqrt(n))
         
         # Valores críticos
-        t_crit_left = stats.t.ppf(0.025, gl)  # Punto crítico izquierdo (2.5%)
-        t_crit_right = stats.t.ppf(0.975, gl)  # Punto crítico derecho (97.5%)
+        t_crit_left = t_ppf(0.025, gl)  # Punto crítico izquierdo (2.5%)
+        t_crit_right = t_ppf(0.975, gl)  # Punto crítico derecho (97.5%)
         
         # Probabilidades
         p_mayor = 1 - stats.t.cdf(t_stat, gl)
@@ -294,7 +406,7 @@ with tab1:
         
         with col2:
             # Visualización
-            x = np.linspace(stats.t.ppf(0.001, gl), stats.t.ppf(0.999, gl), 100)
+            x = np.linspace(t_ppf(0.001, gl), t_ppf(0.999, gl), 100)
             y = stats.t.pdf(x, gl)
             
             # Crear figura
@@ -405,7 +517,8 @@ with tab1:
         
         # Verificar datos antes de procesar
         st.write("### Verificación de Grupos")
-        grupo_counts = df[grupo].value_counts().sort_index()
+        resumen_grupos = agregados.group_summary(variable, grupo)
+        grupo_counts = resumen_grupos['n'].rename('count')
         st.write(f"Distribución de {grupo}:")
         st.write(grupo_counts)
         
@@ -414,27 +527,27 @@ with tab1:
         with col1:
             grupo_valor1 = st.selectbox(
                 "Seleccione el primer grupo:",
-                sorted(df[grupo].unique()),
+                list(resumen_grupos.index),
                 key="grupo1"
             )
         with col2:
             grupo_valor2 = st.selectbox(
                 "Seleccione el segundo grupo:",
-                [x for x in sorted(df[grupo].unique()) if x != grupo_valor1],
+                [x for x in resumen_grupos.index if x != grupo_valor1],
                 key="grupo2"
             )
         
-        # Obtener grupos y verificar tamaños
-        grupo1_data = df[df[grupo] == grupo_valor1][variable]
-        grupo2_data = df[df[grupo] == grupo_valor2][variable]
+        # Obtener estadísticos de los grupos seleccionados
+        grupo1_stats = resumen_grupos.loc[grupo_valor1]
+        grupo2_stats = resumen_grupos.loc[grupo_valor2]
         
         # Calcular estadísticos
-        n1 = len(grupo1_data)
-        n2 = len(grupo2_data)
-        media1 = grupo1_data.mean()
-        media2 = grupo2_data.mean()
-        var1 = grupo1_data.var()
-        var2 = grupo2_data.var()
+        n1 = int(grupo1_stats['n'])
+        n2 = int(grupo2_stats['n'])
+        media1 = grupo1_stats['mean']
+        media2 = grupo2_stats['mean']
+        var1 = grupo1_stats['var']
+        var2 = grupo2_stats['var']
         
         # Diccionario de configuración por variable
         config_variables = {
@@ -464,7 +577,7 @@ with tab1:
         st.write(f"""
         ### Información de la Muestra
         
-        Total de registros en la encuesta: **{len(df)}**
+        Total de registros en la encuesta: **{agregados.rows}**
         
         La variable **{variable}** está siendo comparada entre dos grupos según **{grupo}**:
         """)
@@ -533,8 +646,8 @@ with tab1:
         z_stat = ((media1 - media2) - diff_ref) / np.sqrt((var1/n1) + (var2/n2))
         
         # Valores críticos
-        z_crit_left = stats.norm.ppf(0.025)
-        z_crit_right = stats.norm.ppf(0.975)
+        z_crit_left = norm_ppf(0.025)
+        z_crit_right = norm_ppf(0.975)
         
         # Probabilidades
         p_mayor = 1 - stats.norm.cdf(z_stat)
@@ -651,6 +764,14 @@ with tab1:
                - Conclusión sobre la significancia estadística
             """)
 
+        with st.expander("Simulación Monte Carlo de la distribución muestral"):
+            simulacion_muestral(
+                (df.loc[df[grupo] == grupo_valor1, variable].to_numpy(),
+                 df.loc[df[grupo] == grupo_valor2, variable].to_numpy()),
+                'mean_difference', (n1, n2),
+                {"Referencia": diff_ref}, key="diff_medias"
+            )
+
     # f) Proporción
     with dist_tabs[5]:
         st.write("## f) Distribución Muestral para Proporciones")
@@ -664,9 +785,10 @@ with tab1:
         col1, col2 = st.columns(2)
         
         # Calcular valores por defecto basados en datos reales
-        satisfaccion_alta = 4  # Definimos satisfacción alta como ≥4
-        total_satisfechos = sum(df['Satisfaccion'] >= satisfaccion_alta)
-        total_visitantes = len(df)
+        satisfaccion_alta = SATISFACCION_ALTA  # Definimos satisfacción alta como ≥4
+        resumen_alta = agregados.summary('Satisfaccion_Alta')
+        total_satisfechos = int(round(resumen_alta['sum']))
+        total_visitantes = resumen_alta['n']
         
         with col1:
             # Proporción poblacional
@@ -760,8 +882,8 @@ with tab1:
         p_bilateral = 2 * min(p_mayor, p_menor)
         
         # Valores críticos
-        z_crit_left = stats.norm.ppf(0.025)
-        z_crit_right = stats.norm.ppf(0.975)
+        z_crit_left = norm_ppf(0.025)
+        z_crit_right = norm_ppf(0.975)
         
         # Mostrar resultados
         st.write("### Resultados")
@@ -849,6 +971,15 @@ with tab1:
         
         st.write(interpretacion)
 
+        with st.expander("Simulación Monte Carlo de la distribución muestral"):
+            # Población 0/1 con los éxitos indicados (por defecto, la encuesta)
+            exitos = min(num_exitos, tam_poblacion)
+            simulacion_muestral(
+                np.repeat([1.0, 0.0], [exitos, tam_poblacion - exitos]),
+                'proportion', n,
+                {"Referencia": p_ref}, key="proporcion"
+            )
+
     # g) Diferencia de Proporciones
     with dist_tabs[6]:
         st.write("## g) Distribución Muestral para Diferencia de Proporciones")
@@ -858,18 +989,17 @@ with tab1:
         """)
         
         # Calcular proporciones y tamaños de muestra por género
-        satisfaccion_alta = 4  # Definimos satisfacción alta como ≥4
+        satisfaccion_alta = SATISFACCION_ALTA  # Definimos satisfacción alta como ≥4
+        alta_genero = agregados.group_summary('Satisfaccion_Alta', 'Genero')
         
         # Grupo 1: Masculino (Género = 1)
-        grupo1 = df[df['Genero'] == 1]
-        n1 = len(grupo1)
-        satisfechos1 = sum(grupo1['Satisfaccion'] >= satisfaccion_alta)
+        n1 = int(alta_genero.loc[1, 'n'])
+        satisfechos1 = int(round(alta_genero.loc[1, 'sum']))
         p1 = satisfechos1 / n1
         
         # Grupo 2: Femenino (Género = 2)
-        grupo2 = df[df['Genero'] == 2]
-        n2 = len(grupo2)
-        satisfechos2 = sum(grupo2['Satisfaccion'] >= satisfaccion_alta)
+        n2 = int(alta_genero.loc[2, 'n'])
+        satisfechos2 = int(round(alta_genero.loc[2, 'sum']))
         p2 = satisfechos2 / n2
             
         # Mostrar información básica
@@ -915,8 +1045,8 @@ with tab1:
         p_bilateral = 2 * min(p_mayor, p_menor)
         
         # Valores críticos
-        z_crit_left = stats.norm.ppf(0.025)
-        z_crit_right = stats.norm.ppf(0.975)
+        z_crit_left = norm_ppf(0.025)
+        z_crit_right = norm_ppf(0.975)
         
         # Mostrar resultados
         st.write("### Resultados")
@@ -1005,6 +1135,14 @@ with tab1:
             """
         
         st.write(interpretacion)
+
+        with st.expander("Simulación Monte Carlo de la distribución muestral"):
+            alta = (df['Satisfaccion'] >= SATISFACCION_ALTA).astype(float)
+            simulacion_muestral(
+                (alta[df['Genero'] == 1].to_numpy(), alta[df['Genero'] == 2].to_numpy()),
+                'proportion_difference', (n1, n2),
+                {"Sin diferencia": 0.0}, key="diff_proporciones"
+            )
         
 with tab2:
     st.header("7. Intervalos de Confianza")
@@ -1016,7 +1154,8 @@ with tab2:
         "c) Diferencia de Medias (σ² conocida)",
         "f) Proporción",
         "g) Diferencia de Proporciones",
-        "h) Varianza"
+        "h) Varianza",
+        "i) Tabla de Intervalos"
     ])
     
     # a) Intervalo para la media con varianza conocida
@@ -1035,15 +1174,15 @@ with tab2:
             )
             
             # Calcular estadísticos de la variable seleccionada
-            datos_var = df[var_ic_media]
-            n_ic = len(datos_var)  # Tamaño de muestra
-            media_muestral = datos_var.mean()  # Media muestral
+            resumen = agregados.summary(var_ic_media)
+            n_ic = resumen['n']  # Tamaño de muestra
+            media_muestral = resumen['mean']  # Media muestral
             
             # Input para la desviación estándar poblacional
             desv_est = st.number_input(
                 "Desviación estándar poblacional (σ)",
                 min_value=0.1,
-                value=datos_var.std(),  # Valor sugerido: desviación muestral
+                value=resumen['std'],  # Valor sugerido: desviación muestral
                 step=0.1,
                 key="desv_est_ic"
             )
@@ -1068,7 +1207,7 @@ with tab2:
         
         # Cálculos
         alpha = 1 - nivel_conf
-        z_value = stats.norm.ppf(1 - alpha/2)
+        z_value = norm_ppf(1 - alpha/2)
         error_est = z_value * (desv_est / np.sqrt(n_ic))
         
         ic_lower = media_muestral - error_est
@@ -1184,6 +1323,10 @@ with tab2:
         de la variable '{var_ic_media}' se encuentra entre {ic_lower:.2f} y {ic_upper:.2f}. 
         Esto significa que si tomáramos muchas muestras del mismo tamaño, aproximadamente el {nivel_conf:.0%} 
         de los intervalos calculados contendrían la verdadera media poblacional.""")
+        
+        # Modo estratificado: el mismo intervalo para cada nivel de un grupo
+        with st.expander("📊 Intervalos por estrato"):
+            intervalos_por_estrato(var_ic_media, 'z_mean', nivel_conf, "ic_media", sigma=desv_est)
 
     # b) Intervalo para la media con varianza desconocida
     with conf_tabs[1]:
@@ -1200,10 +1343,10 @@ with tab2:
             )
             
             # Calcular estadísticos de la variable seleccionada
-            datos_var = df[var_ic_media_t]
-            n_ic = len(datos_var)  # Tamaño de muestra
-            media_muestral = datos_var.mean()  # Media muestral
-            desv_est_muestral = datos_var.std()  # Desviación estándar muestral
+            resumen = agregados.summary(var_ic_media_t)
+            n_ic = resumen['n']  # Tamaño de muestra
+            media_muestral = resumen['mean']  # Media muestral
+            desv_est_muestral = resumen['std']  # Desviación estándar muestral
             grados_libertad = n_ic - 1  # Grados de libertad
             
             # Mostrar estadísticos calculados
@@ -1228,7 +1371,7 @@ with tab2:
         
         # Cálculos
         alpha = 1 - nivel_conf
-        t_value = stats.t.ppf(1 - alpha/2, grados_libertad)  # Valor t de Student
+        t_value = t_ppf(1 - alpha/2, grados_libertad)  # Valor t de Student
         error_est = t_value * (desv_est_muestral / np.sqrt(n_ic))
         
         ic_lower = media_muestral - error_est
@@ -1345,10 +1488,11 @@ with tab2:
         # Interpretación
         st.write("### Interpretación:")
         
-        if abs(t_value) > abs(stats.t.ppf(0.975, grados_libertad)):
+        t_critico = abs(t_ppf(0.975, grados_libertad))
+        if abs(t_value) > t_critico:
             interpretacion = f"""
             El valor del estadístico t ({t_value:.4f}) cae en la región crítica 
-            (|t| > {abs(stats.t.ppf(0.975, grados_libertad)):.4f}), lo que sugiere que hay evidencia estadística 
+            (|t| > {t_critico:.4f}), lo que sugiere que hay evidencia estadística 
             significativa de que la media poblacional es diferente del valor de referencia 
             con un nivel de significancia de 0.05.
             
@@ -1357,7 +1501,7 @@ with tab2:
         else:
             interpretacion = f"""
             El valor del estadístico t ({t_value:.4f}) no cae en la región crítica 
-            (|t| ≤ {abs(stats.t.ppf(0.975, grados_libertad)):.4f}), lo que sugiere que no hay evidencia estadística 
+            (|t| ≤ {t_critico:.4f}), lo que sugiere que no hay evidencia estadística 
             significativa de que la media poblacional sea diferente del valor de referencia 
             con un nivel de significancia de 0.05.
             
@@ -1365,6 +1509,10 @@ with tab2:
             """
         
         st.write(interpretacion)
+        
+        # Modo estratificado: el mismo intervalo para cada nivel de un grupo
+        with st.expander("📊 Intervalos por estrato"):
+            intervalos_por_estrato(var_ic_media_t, 't_mean', nivel_conf, "ic_media_t")
 
     # c) Intervalo para la diferencia de medias con varianza conocida
     with conf_tabs[2]:
@@ -1388,12 +1536,17 @@ with tab2:
                 key="var_grupo_ic_diff"
             )
         
+        # Estadísticos de los dos primeros niveles de la variable de grupo
+        resumen_grupos = agregados.group_summary(var_ic_diff, var_grupo)
+        grupo1_stats = resumen_grupos.iloc[0]
+        grupo2_stats = resumen_grupos.iloc[1]
+        
         with col2:
             # Inputs para las varianzas poblacionales
             sigma1 = st.number_input(
                 f"Desviación estándar poblacional de {var_grupo} 1 (σ₁)",
                 min_value=0.1,
-                value=df[df[var_grupo] == df[var_grupo].unique()[0]][var_ic_diff].std(),
+                value=grupo1_stats['std'],
                 step=0.1,
                 key="sigma1_ic_diff"
             )
@@ -1401,7 +1554,7 @@ with tab2:
             sigma2 = st.number_input(
                 f"Desviación estándar poblacional de {var_grupo} 2 (σ₂)",
                 min_value=0.1,
-                value=df[df[var_grupo] == df[var_grupo].unique()[1]][var_ic_diff].std(),
+                value=grupo2_stats['std'],
                 step=0.1,
                 key="sigma2_ic_diff"
             )
@@ -1417,18 +1570,15 @@ with tab2:
             )
     
         # Cálculos para cada grupo
-        datos1 = df[df[var_grupo] == df[var_grupo].unique()[0]][var_ic_diff]
-        datos2 = df[df[var_grupo] == df[var_grupo].unique()[1]][var_ic_diff]
-        
-        n1 = len(datos1)
-        n2 = len(datos2)
-        media1 = datos1.mean()
-        media2 = datos2.mean()
+        n1 = int(grupo1_stats['n'])
+        n2 = int(grupo2_stats['n'])
+        media1 = grupo1_stats['mean']
+        media2 = grupo2_stats['mean']
         diff_medias = media1 - media2
         
         # Cálculos del intervalo
         alpha = 1 - nivel_conf
-        z_value = stats.norm.ppf(1 - alpha/2)
+        z_value = norm_ppf(1 - alpha/2)
         error_est = z_value * np.sqrt((sigma1**2/n1) + (sigma2**2/n2))
         
         ic_lower = diff_medias - error_est
@@ -1572,9 +1722,10 @@ with tab2:
         """)
         
         # Calcular datos reales de satisfacción
-        satisfaccion_alta = 4  # Umbral de satisfacción alta
-        n_total = len(df)
-        n_satisfechos = sum(df['Satisfaccion'] >= satisfaccion_alta)
+        satisfaccion_alta = SATISFACCION_ALTA  # Umbral de satisfacción alta
+        resumen_alta = agregados.summary('Satisfaccion_Alta')
+        n_total = resumen_alta['n']
+        n_satisfechos = int(round(resumen_alta['sum']))
         p_hat = n_satisfechos/n_total
         q_hat = 1 - p_hat
         
@@ -1631,7 +1782,7 @@ with tab2:
     
         # Cálculos del intervalo
         alpha = 1 - nivel_conf
-        z_value = stats.norm.ppf(1 - alpha/2)
+        z_value = norm_ppf(1 - alpha/2)
         error_est = z_value * np.sqrt((p_hat * q_hat)/n_total)
         
         ic_lower = max(0, p_hat - error_est)  # No permitir valores negativos
@@ -1752,6 +1903,10 @@ with tab2:
         
         st.plotly_chart(fig)
         
+        # Modo estratificado: el mismo intervalo para cada nivel de un grupo
+        with st.expander("📊 Intervalos por estrato"):
+            intervalos_por_estrato('Satisfaccion_Alta', 'proportion', nivel_conf, "ic_prop")
+        
     # g) Diferencia de Proporciones
     with conf_tabs[4]:
         st.write("## 7.5 Intervalo de Confianza para la Diferencia de Proporciones")
@@ -1762,18 +1917,17 @@ with tab2:
         """)
         
         # Calcular proporciones y tamaños de muestra por género
-        satisfaccion_alta = 4  # Definimos satisfacción alta como ≥4
+        satisfaccion_alta = SATISFACCION_ALTA  # Definimos satisfacción alta como ≥4
+        alta_genero = agregados.group_summary('Satisfaccion_Alta', 'Genero')
         
         # Grupo 1: Masculino (Género = 1)
-        grupo1 = df[df['Genero'] == 1]
-        n1 = len(grupo1)
-        satisfechos1 = sum(grupo1['Satisfaccion'] >= satisfaccion_alta)
+        n1 = int(alta_genero.loc[1, 'n'])
+        satisfechos1 = int(round(alta_genero.loc[1, 'sum']))
         p1 = satisfechos1 / n1
         
         # Grupo 2: Femenino (Género = 2)
-        grupo2 = df[df['Genero'] == 2]
-        n2 = len(grupo2)
-        satisfechos2 = sum(grupo2['Satisfaccion'] >= satisfaccion_alta)
+        n2 = int(alta_genero.loc[2, 'n'])
+        satisfechos2 = int(round(alta_genero.loc[2, 'sum']))
         p2 = satisfechos2 / n2
             
         # Entrada de datos (mostrando los valores reales calculados)
@@ -1826,7 +1980,7 @@ with tab2:
         
         # Cálculos
         alpha = 1 - nivel_conf
-        z_critico = stats.norm.ppf(1 - alpha/2)
+        z_critico = norm_ppf(1 - alpha/2)
         
         # Complementos
         q1 = 1 - p1_input
@@ -2003,3 +2157,114 @@ with tab2:
         st.write("### Pasos de cálculo:")
         latex_copyable(r"\text{Límite inferior: } \frac{(n-1)s^2}{\chi^2_{n-1,1-\frac{\alpha}{2}}}", "ic_var_paso1")
         latex_copyable(r"\text{Límite superior: } \frac{(n-1)s^2}{\chi^2_{n-1,\frac{\alpha}{2}}}", "ic_var_paso2")
+        
+        # Cálculo con los datos de la encuesta
+        st.write("### Cálculo")
+        col1, col2 = st.columns(2)
+        with col1:
+            var_ic_var = st.selectbox(
+                "Seleccione la variable numérica",
+                options=["Edad", "Frecuencia_Visitas", "Satisfaccion", "Preferencia"],
+                key="var_ic_var"
+            )
+            resumen = agregados.summary(var_ic_var)
+            n_var = resumen['n']
+            s2 = resumen['var']
+            st.write(f"""
+            - Tamaño de muestra (n): {n_var}
+            - Varianza muestral (s²): {s2:.4f}
+            - Grados de libertad (n-1): {n_var - 1}
+            """)
+        with col2:
+            nivel_conf = st.slider(
+                "Nivel de confianza",
+                min_value=0.80,
+                max_value=0.99,
+                value=0.95,
+                step=0.01,
+                key="nivel_conf_ic_var"
+            )
+        
+        alpha = 1 - nivel_conf
+        chi2_inf = chi2_ppf(alpha/2, n_var - 1)
+        chi2_sup = chi2_ppf(1 - alpha/2, n_var - 1)
+        ic_lower, ic_upper = ci.variance(s2, n_var, nivel_conf)
+        
+        latex_copyable(
+            r"IC(\sigma^2) = \left(\frac{(%d)(%.4f)}{%.4f}, \frac{(%d)(%.4f)}{%.4f}\right) = (%.4f, %.4f)" % (
+                n_var - 1, s2, chi2_sup, n_var - 1, s2, chi2_inf, ic_lower, ic_upper
+            ),
+            "ic_var_valores"
+        )
+        
+        col1, col2 = st.columns(2)
+        col1.metric("IC para la varianza (σ²)", f"({ic_lower:.4f}, {ic_upper:.4f})")
+        col2.metric("IC para la desviación estándar (σ)", f"({np.sqrt(ic_lower):.4f}, {np.sqrt(ic_upper):.4f})")
+        
+        st.write(f"""Con un nivel de confianza del {nivel_conf:.0%}, se estima que la varianza poblacional 
+        de {var_ic_var} se encuentra entre {ic_lower:.4f} y {ic_upper:.4f}.""")
+        
+        # Modo estratificado: el mismo intervalo para cada nivel de un grupo
+        with st.expander("📊 Intervalos por estrato"):
+            intervalos_por_estrato(var_ic_var, 'variance', nivel_conf, "ic_var")
+    
+    # i) Tabla con todos los intervalos
+    with conf_tabs[6]:
+        st.write("## 7.7 Tabla de Intervalos de Confianza")
+        
+        st.write("""
+        Todos los intervalos (media con Z y con t, varianza, proporción de satisfacción alta y
+        diferencias entre grupos) para las variables y niveles de confianza elegidos, calculados
+        en una sola pasada vectorizada.
+        """)
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            variables_grid = st.multiselect(
+                "Variables",
+                options=["Edad", "Frecuencia_Visitas", "Satisfaccion", "Preferencia"],
+                default=["Edad", "Frecuencia_Visitas", "Satisfaccion", "Preferencia"],
+                key="variables_ic_grid"
+            )
+            grupo_grid = st.selectbox(
+                "Subgrupos",
+                options=["Ninguno", "Genero", "Importancia_Costo"],
+                key="grupo_ic_grid"
+            )
+        with col2:
+            niveles_grid = st.multiselect(
+                "Niveles de confianza",
+                options=[0.80, 0.90, 0.95, 0.99],
+                default=[0.90, 0.95, 0.99],
+                format_func=lambda nivel: f"{nivel:.0%}",
+                key="niveles_ic_grid"
+            )
+        
+        if not variables_grid or not niveles_grid:
+            st.info("Seleccione al menos una variable y un nivel de confianza.")
+        else:
+            tabla_ic = StatisticalAnalyzer().confidence_intervals(
+                agregados,
+                variables_grid,
+                sorted(niveles_grid),
+                by=None if grupo_grid == "Ninguno" else grupo_grid,
+                proportions=['Satisfaccion_Alta']
+            ).to_pandas()
+            metodos = {
+                'z_mean': 'Media (Z)',
+                't_mean': 'Media (t)',
+                'variance': 'Varianza (χ²)',
+                'proportion': 'Proporción',
+                'mean_difference': 'Diferencia de medias (Welch)',
+                'proportion_difference': 'Diferencia de proporciones',
+            }
+            tabla_ic['method'] = tabla_ic['method'].map(metodos)
+            tabla_ic['confidence'] = tabla_ic['confidence'].map(lambda nivel: f"{nivel:.0%}")
+            st.dataframe(
+                tabla_ic.rename(columns={
+                    'method': 'Intervalo', 'column': 'Variable', 'group': 'Grupo',
+                    'confidence': 'Confianza', 'estimate': 'Estimación',
+                    'lower': 'Límite inferior', 'upper': 'Límite superior'
+                }),
+                hide_index=True
+            )
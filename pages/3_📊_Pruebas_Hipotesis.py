@@ -3,7 +3,8 @@ import numpy as np
 from scipy import stats
 import plotly.graph_objects as go
 import pandas as pd
-from pathlib import Path
+from src.critical_values import chi2_ppf, norm_ppf, t_ppf
+from src.data_loader import load_numeric_survey, load_survey_aggregates
 
 def latex_copyable(formula, label=""):
     """Muestra una fórmula LaTeX con un botón para copiar."""
@@ -25,16 +26,11 @@ st.set_page_config(
     layout="wide"
 )
 
-# Función para cargar datos
-@st.cache_data(ttl=0)
-def cargar_datos():
-    ruta_base = Path(__file__).parent.parent
-    ruta_datos = ruta_base / 'data' / 'encuesta_recreacion_numerica.csv'
-    df = pd.read_csv(ruta_datos)
-    return df
-
 # Cargar datos
-df = cargar_datos()
+df = load_numeric_survey()
+
+# Estadísticos suficientes precalculados por columna y por grupo
+agregados = load_survey_aggregates()
 
 # Configuración de variables
 config_variables = {
@@ -118,12 +114,13 @@ with main_tabs[0]:
         alpha = 0.05  # Nivel de significancia fijo
         
         # Estadísticos de la muestra
-        n = len(df[variable])
-        media_muestral = df[variable].mean()
+        resumen = agregados.summary(variable)
+        n = resumen['n']
+        media_muestral = resumen['mean']
         z_calc = (media_muestral - mu0) / (sigma / np.sqrt(n))
         
         # Valores críticos para prueba bilateral
-        z_crit = stats.norm.ppf(1 - alpha/2)
+        z_crit = norm_ppf(1 - alpha/2)
         p_value = 2 * (1 - stats.norm.cdf(abs(z_calc)))
         
         # Mostrar resultados
@@ -199,7 +196,7 @@ with main_tabs[0]:
         st.write("### Visualización")
         
         # Crear datos para la distribución normal
-        x = np.linspace(stats.norm.ppf(0.001), stats.norm.ppf(0.999), 1000)
+        x = np.linspace(norm_ppf(0.001), norm_ppf(0.999), 1000)
         y = stats.norm.pdf(x)
         
         # Crear figura
@@ -274,14 +271,15 @@ with main_tabs[0]:
         alpha = 0.05  # Nivel de significancia fijo
         
         # Estadísticos de la muestra
-        n = len(df[variable])
-        media_muestral = df[variable].mean()
-        s = df[variable].std()  # Desviación estándar muestral
+        resumen = agregados.summary(variable)
+        n = resumen['n']
+        media_muestral = resumen['mean']
+        s = resumen['std']  # Desviación estándar muestral
         gl = n - 1  # Grados de libertad
         t_calc = (media_muestral - mu0) / (s / np.sqrt(n))
         
         # Valores críticos para prueba bilateral
-        t_crit = stats.t.ppf(1 - alpha/2, gl)
+        t_crit = t_ppf(1 - alpha/2, gl)
         p_value = 2 * (1 - stats.t.cdf(abs(t_calc), gl))
         
         # Mostrar resultados
@@ -359,7 +357,7 @@ with main_tabs[0]:
         st.write("### Visualización")
         
         # Crear datos para la distribución t
-        x = np.linspace(stats.t.ppf(0.001, gl), stats.t.ppf(0.999, gl), 1000)
+        x = np.linspace(t_ppf(0.001, gl), t_ppf(0.999, gl), 1000)
         y = stats.t.pdf(x, gl)
         
         # Crear figura
@@ -450,7 +448,7 @@ with main_tabs[0]:
         z_calc = (media1 - media2) / np.sqrt((sigma**2/n1) + (sigma**2/n2))
         
         # Valores críticos para prueba bilateral
-        z_crit = stats.norm.ppf(1 - alpha/2)
+        z_crit = norm_ppf(1 - alpha/2)
         p_value = 2 * (1 - stats.norm.cdf(abs(z_calc)))
         
         # Mostrar resultados
@@ -537,7 +535,7 @@ with main_tabs[0]:
         st.write("### Visualización")
         
         # Crear datos para la distribución normal
-        x = np.linspace(stats.norm.ppf(0.001), stats.norm.ppf(0.999), 1000)
+        x = np.linspace(norm_ppf(0.001), norm_ppf(0.999), 1000)
         y = stats.norm.pdf(x)
         
         # Crear figura
@@ -622,20 +620,19 @@ with main_tabs[0]:
         """)
         
         # Separar datos por género
-        grupo1 = df[df['Genero'] == 1]['Satisfaccion']
-        grupo2 = df[df['Genero'] == 2]['Satisfaccion']
+        grupos = agregados.group_summary('Satisfaccion', 'Genero')
         
         # Verificar que hay suficientes datos en cada grupo
-        if len(grupo1) == 0 or len(grupo2) == 0:
+        if not {1, 2} <= set(grupos.index) or (grupos['n'] == 0).any():
             st.error("Error: No hay suficientes datos en uno o ambos grupos.")
         else:
             # Calcular estadísticos
-            n1 = len(grupo1)
-            n2 = len(grupo2)
-            media1 = grupo1.mean()
-            media2 = grupo2.mean()
-            var1 = grupo1.var(ddof=1)
-            var2 = grupo2.var(ddof=1)
+            n1 = int(grupos.loc[1, 'n'])
+            n2 = int(grupos.loc[2, 'n'])
+            media1 = grupos.loc[1, 'mean']
+            media2 = grupos.loc[2, 'mean']
+            var1 = grupos.loc[1, 'var']
+            var2 = grupos.loc[2, 'var']
             
             # Verificar que las varianzas no son cero
             if var1 == 0 and var2 == 0:
@@ -660,7 +657,7 @@ with main_tabs[0]:
                         
                         # Valores críticos
                         alpha = 0.05
-                        t_crit = stats.t.ppf(1 - alpha/2, gl)
+                        t_crit = t_ppf(1 - alpha/2, gl)
                         p_value = 2 * (1 - stats.t.cdf(abs(t_calc), gl))
                         
                         # Mostrar resultados
@@ -739,7 +736,7 @@ with main_tabs[0]:
                         st.write("### Visualización")
                         
                         # Crear datos para la distribución t
-                        x = np.linspace(stats.t.ppf(0.001, gl), stats.t.ppf(0.999, gl), 1000)
+                        x = np.linspace(t_ppf(0.001, gl), t_ppf(0.999, gl), 1000)
                         y = stats.t.pdf(x, gl)
                         
                         # Crear figura
@@ -784,6 +781,9 @@ with main_tabs[0]:
                         st.plotly_chart(fig, use_container_width=True)
                         
                         # Añadir boxplot para visualizar distribución por género
+                        # (el gráfico sí necesita las observaciones individuales)
+                        grupo1 = df.loc[df['Genero'] == 1, 'Satisfaccion']
+                        grupo2 = df.loc[df['Genero'] == 2, 'Satisfaccion']
                         fig_box = go.Figure()
                         
                         fig_box.add_trace(go.Box(y=grupo1, name='Masculino',
@@ -823,20 +823,19 @@ with main_tabs[0]:
         """)
         
         # Separar datos por género
-        grupo1 = df[df['Genero'] == 1]['Satisfaccion']  # Masculino (1)
-        grupo2 = df[df['Genero'] == 2]['Satisfaccion']  # Femenino (2)
+        grupos = agregados.group_summary('Satisfaccion', 'Genero')  # Masculino (1), Femenino (2)
         
         # Verificar que hay suficientes datos en cada grupo
-        if len(grupo1) == 0 or len(grupo2) == 0:
+        if not {1, 2} <= set(grupos.index) or (grupos['n'] == 0).any():
             st.error("Error: No hay suficientes datos en uno o ambos grupos.")
         else:
             # Calcular estadísticos
-            n1 = len(grupo1)
-            n2 = len(grupo2)
-            media1 = grupo1.mean()
-            media2 = grupo2.mean()
-            var1 = grupo1.var(ddof=1)
-            var2 = grupo2.var(ddof=1)
+            n1 = int(grupos.loc[1, 'n'])
+            n2 = int(grupos.loc[2, 'n'])
+            media1 = grupos.loc[1, 'mean']
+            media2 = grupos.loc[2, 'mean']
+            var1 = grupos.loc[1, 'var']
+            var2 = grupos.loc[2, 'var']
             
             # Verificar que las varianzas no son cero
             if var1 == 0 and var2 == 0:
@@ -856,7 +855,7 @@ with main_tabs[0]:
                     
                     # Valores críticos (cambio a unilateral)
                     alpha = 0.05
-                    t_crit = stats.t.ppf(1 - alpha, gl)  # Ya no dividimos alpha entre 2
+                    t_crit = t_ppf(1 - alpha, gl)  # Ya no dividimos alpha entre 2
                     p_value = 1 - stats.t.cdf(t_calc, gl)  # Solo cola derecha
                     
                     # Mostrar resultados
@@ -936,7 +935,7 @@ with main_tabs[0]:
                     st.write("### Visualización")
                     
                     # Crear datos para la distribución t
-                    x = np.linspace(stats.t.ppf(0.001, gl), stats.t.ppf(0.999, gl), 1000)
+                    x = np.linspace(t_ppf(0.001, gl), t_ppf(0.999, gl), 1000)
                     y = stats.t.pdf(x, gl)
                     
                     # Crear figura
@@ -976,6 +975,9 @@ with main_tabs[0]:
                     st.plotly_chart(fig, use_container_width=True)
                     
                     # Añadir boxplot para visualizar distribución por género
+                    # (el gráfico sí necesita las observaciones individuales)
+                    grupo1 = df.loc[df['Genero'] == 1, 'Satisfaccion']
+                    grupo2 = df.loc[df['Genero'] == 2, 'Satisfaccion']
                     fig_box = go.Figure()
                     
                     fig_box.add_trace(go.Box(y=grupo1, name='Masculino',
@@ -1013,8 +1015,9 @@ with main_tabs[0]:
         st.write("**Nivel de significancia:** α = 0.05")
         
         # Calcular proporción muestral
-        satisfechos = df[df['Satisfaccion'] >= 4].shape[0]
-        total = df.shape[0]
+        resumen_alta = agregados.summary('Satisfaccion_Alta')
+        satisfechos = int(round(resumen_alta['sum']))
+        total = resumen_alta['n']
         
         # Mostrar datos
         st.write("""### Datos Muestrales""")
@@ -1041,7 +1044,7 @@ with main_tabs[0]:
                 
                 # Valores críticos
                 alpha = 0.05
-                z_crit = stats.norm.ppf(1 - alpha/2)
+                z_crit = norm_ppf(1 - alpha/2)
                 p_value = 2 * (1 - stats.norm.cdf(abs(z_calc)))
                 
                 # Mostrar resultados
@@ -1176,15 +1179,14 @@ with main_tabs[0]:
         
         # Cálculos
         # Grupo 1: Hombres
-        df_hombres = df[df['Genero'] == 1]
-        n1 = len(df_hombres)
-        satisfechos_h = len(df_hombres[df_hombres['Satisfaccion'] >= 4])
+        alta_genero = agregados.group_summary('Satisfaccion_Alta', 'Genero')
+        n1 = int(alta_genero.loc[1, 'n'])
+        satisfechos_h = int(round(alta_genero.loc[1, 'sum']))
         p1 = satisfechos_h / n1
         
         # Grupo 2: Mujeres
-        df_mujeres = df[df['Genero'] == 2]
-        n2 = len(df_mujeres)
-        satisfechos_m = len(df_mujeres[df_mujeres['Satisfaccion'] >= 4])
+        n2 = int(alta_genero.loc[2, 'n'])
+        satisfechos_m = int(round(alta_genero.loc[2, 'sum']))
         p2 = satisfechos_m / n2
         
         # Proporción combinada
@@ -1195,7 +1197,7 @@ with main_tabs[0]:
         
         # Valor crítico (bilateral)
         alpha = 0.05
-        z_crit = stats.norm.ppf(1 - alpha/2)
+        z_crit = norm_ppf(1 - alpha/2)
         
         # P-valor
         p_value = 2 * (1 - stats.norm.cdf(abs(z_calc)))
@@ -1245,7 +1247,7 @@ with main_tabs[0]:
         st.write("### Visualización")
         
         # Crear datos para la distribución normal
-        x = np.linspace(stats.norm.ppf(0.001), stats.norm.ppf(0.999), 1000)
+        x = np.linspace(norm_ppf(0.001), norm_ppf(0.999), 1000)
         y = stats.norm.pdf(x)
         
         # Crear figura
@@ -1339,14 +1341,15 @@ with main_tabs[0]:
         """)
         
         # Cálculos
-        n = len(df)
-        s2 = df['Satisfaccion'].var()
+        resumen = agregados.summary('Satisfaccion')
+        n = resumen['n']
+        s2 = resumen['var']
         sigma2_0 = 1  # Varianza hipotética
         alpha = 0.05
         
         # Valores críticos (bilateral)
-        chi2_crit_inf = stats.chi2.ppf(alpha/2, n - 1)
-        chi2_crit_sup = stats.chi2.ppf(1 - alpha/2, n - 1)
+        chi2_crit_inf = chi2_ppf(alpha/2, n - 1)
+        chi2_crit_sup = chi2_ppf(1 - alpha/2, n - 1)
         
         # Estadístico de prueba
         chi2_calc = (n - 1) * s2 / sigma2_0
@@ -1361,7 +1364,7 @@ with main_tabs[0]:
         st.write("### Visualización")
         
         # Crear datos para la distribución chi-cuadrado
-        x = np.linspace(stats.chi2.ppf(0.001, n - 1), stats.chi2.ppf(0.999, n - 1), 1000)
+        x = np.linspace(chi2_ppf(0.001, n - 1), chi2_ppf(0.999, n - 1), 1000)
         y = stats.chi2.pdf(x, n - 1)
         
         # Crear figura
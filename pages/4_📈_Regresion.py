@@ -7,6 +7,8 @@ import plotly.express as px
 from sklearn.linear_model import LinearRegression
 from sklearn.metrics import r2_score, mean_squared_error
 import seaborn as sns
+from src.data_loader import load_numeric_survey, load_survey_aggregates
+from src.resampling import bootstrap
 
 def latex_copyable(formula, label=""):
     """Muestra una fórmula LaTeX con un botón para copiar."""
@@ -28,13 +30,14 @@ st.set_page_config(
     layout="wide"
 )
 
-# Función para cargar datos
-@st.cache_data
-def cargar_datos():
-    return pd.read_csv('data/encuesta_recreacion_numerica.csv')
-
 # Cargar datos
-df = cargar_datos()
+df = load_numeric_survey(
+    columns=['Edad', 'Frecuencia_Visitas', 'Importancia_Costo', 'Satisfaccion', 'Preferencia']
+)
+
+# Matriz de productos cruzados precalculada: las sumatorias de la regresión
+# simple no requieren recorrer las filas
+agregados = load_survey_aggregates()
 
 # Título principal
 st.title("📈 Análisis de Regresión")
@@ -94,8 +97,9 @@ with main_tabs[0]:
     """)
     
     # Preparar datos para la regresión
-    X = df[x_var].values.reshape(-1, 1)
-    y = df[y_var].values
+    # Se opera en float64: el dataset se guarda con tipos enteros estrechos
+    X = df[x_var].to_numpy(dtype=float).reshape(-1, 1)
+    y = df[y_var].to_numpy(dtype=float)
     
     # Crear tabla de cálculos intermedios
     calculos_df = pd.DataFrame({
@@ -106,10 +110,17 @@ with main_tabs[0]:
         'Y²': y ** 2
     })
     
-    # Calcular sumatorias
-    sumas = calculos_df.sum()
-    medias = calculos_df.mean()
-    n = len(calculos_df)
+    # Sumatorias desde los estadísticos suficientes
+    sumas_reg = agregados.regression_sums(x_var, y_var)
+    n = sumas_reg['n']
+    sumas = pd.Series({
+        'X': sumas_reg['sum_x'],
+        'Y': sumas_reg['sum_y'],
+        'XY': sumas_reg['sum_xy'],
+        'X²': sumas_reg['sum_x2'],
+        'Y²': sumas_reg['sum_y2']
+    })
+    medias = sumas / n
     
     # Calcular coeficientes manualmente
     beta1 = (n * sumas['XY'] - sumas['X'] * sumas['Y']) / (n * sumas['X²'] - sumas['X']**2)
@@ -169,28 +180,24 @@ with main_tabs[0]:
     formula_reg_val = r"Y = %.4f + %.4fX" % (beta0, beta1)
     latex_copyable(formula_reg_val, "eq_reg_valores")
     
-    # Crear y ajustar el modelo
-    modelo = LinearRegression()
-    modelo.fit(X, y)
-    
-    # Predicciones
-    y_pred = modelo.predict(X)
+    # Predicciones del modelo ajustado
+    y_pred = beta0 + beta1 * X.flatten()
     
-    # Calcular R² y RMSE
-    r2 = r2_score(y, y_pred)
-    rmse = np.sqrt(mean_squared_error(y, y_pred))
+    # Calcular R² y RMSE a partir de las sumas de cuadrados centradas
+    sse = sumas_reg['syy'] - beta1 * sumas_reg['sxy']
+    r2 = sumas_reg['sxy'] ** 2 / (sumas_reg['sxx'] * sumas_reg['syy'])
+    rmse = np.sqrt(sse / n)
     
     # Calcular estadísticas adicionales usando scipy
-    n = len(X)
     p = 1  # número de predictores
     
     # Error estándar de los coeficientes
-    mse = mean_squared_error(y, y_pred)
+    mse = sse / n
     var_e = mse * (n-1) / (n-p-1)
-    sd_b = np.sqrt(var_e / np.sum((X - X.mean())**2))
+    sd_b = np.sqrt(var_e / sumas_reg['sxx'])
     
     # t-valor y p-valor para la pendiente
-    t_stat = modelo.coef_[0] / sd_b
+    t_stat = beta1 / sd_b
     p_value = 2 * (1 - stats.t.cdf(abs(t_stat), df=n-2))
     
     # Mostrar estadísticas del modelo
@@ -206,7 +213,7 @@ with main_tabs[0]:
     st.markdown("### Ecuación de Regresión")
     
     # Fórmula con coeficientes del modelo
-    formula_modelo = r"Y = %.4f + %.4fX" % (modelo.intercept_, modelo.coef_[0])
+    formula_modelo = r"Y = %.4f + %.4fX" % (beta0, beta1)
     latex_copyable(formula_modelo, "eq_modelo")
     
     st.markdown("""
@@ -220,6 +227,17 @@ with main_tabs[0]:
     - X: %s
     """ % (sd_b, t_stat, p_value, y_label, x_label))
     
+    # Intervalos bootstrap de la pendiente (remuestreo de pares X, Y)
+    with st.expander("🔁 Intervalos bootstrap de la pendiente"):
+        remuestreo = bootstrap(np.column_stack([X.flatten(), y]), 'slope', workers=1)
+        st.dataframe(pd.DataFrame(
+            [remuestreo['percentile'], remuestreo['basic'], remuestreo['bca']],
+            index=['Percentil', 'Básico', 'BCa'],
+            columns=['Límite inferior', 'Límite superior']
+        ))
+        st.write(f"Error estándar bootstrap: {remuestreo['std_error']:.4f} "
+                 f"({remuestreo['n_resamples']:,} remuestras, confianza 95%)")
+    
     # Visualización
     st.markdown("### Visualización")
     
@@ -248,7 +266,7 @@ with main_tabs[0]:
     
     # Agregar línea de regresión
     X_line = np.linspace(X.min(), X.max(), 100).reshape(-1, 1)
-    y_line = modelo.predict(X_line)
+    y_line = beta0 + beta1 * X_line.flatten()
     
     fig.add_trace(go.Scatter(
         x=X_line.flatten(),
@@ -347,7 +365,7 @@ with main_tabs[1]:
     """)
     
     # Preparar datos para la regresión múltiple (primeros 10 registros)
-    df_10 = df.head(10)
+    df_10 = df.head(10).astype(float)
     X = df_10[['Edad', 'Frecuencia_Visitas']]
     y = df_10['Satisfaccion']
     
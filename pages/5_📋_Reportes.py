@@ -2,36 +2,45 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 from scipy import stats
-from pathlib import Path
+from src.analysis import StatisticalAnalyzer
+from src.data_loader import load_numeric_survey, load_survey, load_survey_index
+from src.encoding import load_codebook
+from src.multiple_testing import CORRECTIONS, correct_table
+from src.ranks import kruskal_wallis, mann_whitney
+from src.resampling import permutation_test
 
 # Configuración de la página
 st.set_page_config(page_title="Pruebas de Hipótesis", page_icon="📋", layout="wide")
 
-# Función para cargar datos
-@st.cache_data
-def cargar_datos():
-    ruta_base = Path(__file__).parent.parent
-    ruta_datos = ruta_base / 'data' / 'encuesta_recreacion.csv'
-    return pd.read_csv(ruta_datos)
-
 # Cargar datos
-df = cargar_datos()
+df_encuesta = load_survey('encuesta_recreacion.csv')
+indice = load_survey_index('encuesta_recreacion.csv')
 
 # Título de la página
 st.title("📋 Pruebas de Hipótesis")
 
-# Convertir satisfacción a numérica para análisis
-satisfaccion_map = {
-    'Poco satisfecho': 1, 'Poco satisfecha': 1,
-    'Satisfecho': 2, 'Satisfecha': 2,
-    'Muy satisfecho': 3, 'Muy satisfecha': 3
-}
-df['Satisfaccion_num'] = df['Satisfacción'].map(satisfaccion_map)
+# Convertir satisfacción a numérica para análisis según el libro de códigos
+df_encuesta['Satisfaccion_num'] = load_codebook().numeric_values(df_encuesta, 'Satisfacción')
+
+# Filtro de subpoblación: AND entre columnas, OR entre los valores elegidos
+with st.sidebar:
+    st.header("🔎 Subpoblación")
+    filtros = {}
+    for columna in ['Género', 'Residencia', 'Época del Año de Visita Frecuente', 'Ubicación del Centro']:
+        valores = st.multiselect(columna, indice.labels(columna))
+        if valores:
+            filtros[columna] = valores
+
+seleccion = indice.filter(filtros)
+if seleccion.count() == 0:
+    st.warning("Ninguna respuesta cumple el filtro seleccionado.")
+    st.stop()
+df = df_encuesta.iloc[seleccion.rows()]
 
 # Selección de prueba
 tipo_prueba = st.selectbox(
     "Seleccione el tipo de prueba",
-    ["Media", "Proporción", "Chi-cuadrado", "No Paramétrica"]
+    ["Media", "Proporción", "Chi-cuadrado", "No Paramétrica", "Comparaciones Múltiples"]
 )
 
 if tipo_prueba == "Media":
@@ -71,7 +80,7 @@ elif tipo_prueba == "Proporción":
         alpha = st.slider("Nivel de significancia", 0.01, 0.10, 0.05)
     
     # Calcular proporción de satisfechos
-    satisfechos = df['Satisfaccion_num'] >= 2
+    satisfechos = df['Satisfaccion_num'] >= 4
     p_hat = np.mean(satisfechos)
     n = len(df)
     
@@ -103,8 +112,15 @@ elif tipo_prueba == "Chi-cuadrado":
         var2 = st.selectbox("Variable 2", ["Satisfacción", "Frecuencia de Visitas", "Actividades"])
         alpha = st.slider("Nivel de significancia", 0.01, 0.10, 0.05)
     
-    # Crear tabla de contingencia
-    contingencia = pd.crosstab(df[var1], df[var2])
+    # Crear tabla de contingencia solo con las categorías observadas: con
+    # pandas < 3 crosstab conserva las que el filtro dejó vacías y
+    # chi2_contingency rechaza las filas o columnas en cero
+    fila, columna = df[var1], df[var2]
+    if isinstance(fila.dtype, pd.CategoricalDtype):
+        fila = fila.cat.remove_unused_categories()
+    if isinstance(columna.dtype, pd.CategoricalDtype):
+        columna = columna.cat.remove_unused_categories()
+    contingencia = pd.crosstab(fila, columna)
     
     # Realizar prueba
     chi2, p_valor, gl, esperados = stats.chi2_contingency(contingencia)
@@ -129,22 +145,26 @@ elif tipo_prueba == "Chi-cuadrado":
         st.success(f"No se rechaza H₀ (p-valor = {p_valor:.3f} > {alpha})")
         st.write("No hay evidencia suficiente de asociación entre las variables.")
 
-else:  # No Paramétrica
+elif tipo_prueba == "No Paramétrica":
     st.header("3.5 Pruebas No Paramétricas")
     
     # Selección de prueba
     prueba_np = st.selectbox(
         "Seleccione la prueba",
-        ["Mann-Whitney U", "Kruskal-Wallis H"]
+        ["Mann-Whitney U", "Kruskal-Wallis H", "Permutación"]
     )
     
     if prueba_np == "Mann-Whitney U":
-        # Comparar preferencias entre géneros
-        grupo1 = df[df['Género'] == 'Masculino']['Preferencia']
-        grupo2 = df[df['Género'] == 'Femenino']['Preferencia']
+        # Comparar preferencias entre géneros (filas tomadas del índice de bitmaps)
+        grupo1 = (seleccion & indice.bitmap('Género', 'Masculino')).rows()
+        grupo2 = (seleccion & indice.bitmap('Género', 'Femenino')).rows()
         
-        # Realizar prueba
-        stat, p_valor = stats.mannwhitneyu(grupo1, grupo2, alternative='two-sided')
+        if len(grupo1) == 0 or len(grupo2) == 0:
+            st.warning("La subpoblación seleccionada no incluye ambos géneros.")
+            st.stop()
+        
+        # Realizar prueba con los rangos en caché de la columna completa
+        stat, p_valor = mann_whitney(df_encuesta, 'Preferencia', grupo1, grupo2)
         
         # Mostrar resultados
         st.subheader("Resultados Mann-Whitney U")
@@ -161,10 +181,53 @@ else:  # No Paramétrica
             st.success(f"No se rechaza H₀ (p-valor = {p_valor:.3f} > 0.05)")
             st.write("No hay evidencia de diferencia en las preferencias entre géneros.")
     
+    elif prueba_np == "Permutación":
+        # Diferencia entre géneros con valor p de permutación, útil cuando los
+        # grupos de la subpoblación son pequeños
+        estadistico = st.selectbox(
+            "Estadístico",
+            ["mean", "median"],
+            format_func={"mean": "Diferencia de medias", "median": "Diferencia de medianas"}.get
+        )
+        preferencia = df_encuesta['Preferencia'].to_numpy()
+        grupo1 = preferencia[(seleccion & indice.bitmap('Género', 'Masculino')).rows()]
+        grupo2 = preferencia[(seleccion & indice.bitmap('Género', 'Femenino')).rows()]
+        
+        if len(grupo1) == 0 or len(grupo2) == 0:
+            st.warning("La subpoblación seleccionada no incluye ambos géneros.")
+            st.stop()
+        
+        # Con tan pocas filas un solo proceso es más rápido que el pool
+        resultado = permutation_test(grupo1, grupo2, estadistico, workers=1)
+        p_valor = resultado['p_value']
+        
+        st.subheader("Resultados de la Prueba de Permutación")
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Diferencia observada", f"{resultado['statistic']:.3f}")
+        col2.metric("Valor p", f"{p_valor:.3f}")
+        col3.metric("Permutaciones", f"{resultado['permutations']:,}")
+        if resultado['exact']:
+            st.write("Valor p exacto (se enumeraron todas las asignaciones posibles).")
+        else:
+            st.write(f"Error de Monte Carlo del valor p: ±{resultado['mc_error']:.4f}")
+        
+        st.subheader("Interpretación")
+        if p_valor < 0.05:
+            st.error(f"Se rechaza H₀ (p-valor = {p_valor:.3f} < 0.05)")
+            st.write("Existe diferencia significativa en las preferencias entre géneros.")
+        else:
+            st.success(f"No se rechaza H₀ (p-valor = {p_valor:.3f} > 0.05)")
+            st.write("No hay evidencia de diferencia en las preferencias entre géneros.")
+    
     else:  # Kruskal-Wallis
         # Comparar preferencias entre grupos de edad
-        stat, p_valor = stats.kruskal(*[group['Preferencia'].values 
-                                      for name, group in df.groupby('Edad')])
+        grupos_edad = df.loc[df['Preferencia'].notna(), 'Edad'].nunique()
+
+        if grupos_edad < 2:
+            st.warning("La subpoblación seleccionada no incluye al menos dos grupos de edad.")
+            st.stop()
+
+        stat, p_valor = kruskal_wallis(df_encuesta, 'Preferencia', 'Edad', rows=seleccion.rows())
         
         # Mostrar resultados
         st.subheader("Resultados Kruskal-Wallis H")
@@ -181,6 +244,28 @@ else:  # No Paramétrica
             st.success(f"No se rechaza H₀ (p-valor = {p_valor:.3f} > 0.05)")
             st.write("No hay evidencia de diferencia en las preferencias entre grupos de edad.")
 
+elif tipo_prueba == "Comparaciones Múltiples":
+    st.header("3.6 ANOVA de Todas las Variables con Corrección Múltiple")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        factor = st.selectbox("Factor de agrupación", ["Genero", "Importancia_Costo", "Edad"])
+        alpha = st.slider("Nivel de significancia", 0.01, 0.10, 0.05)
+    with col2:
+        correccion = st.selectbox("Corrección", list(CORRECTIONS), format_func=CORRECTIONS.get)
+    
+    # Una prueba por variable numérica sobre la subpoblación filtrada
+    df_numerico = load_numeric_survey().iloc[seleccion.rows()]
+    variables = [c for c in df_numerico.columns if c not in ('ID', factor)]
+    tabla = StatisticalAnalyzer().anova_batch(df_numerico, variables, factor)
+    tabla = correct_table(tabla, correccion, alpha)
+    
+    st.subheader("Resultados")
+    st.dataframe(tabla.to_pandas()[['column', 'groups', 'n', 'statistic', 'effect_size',
+                                    'p_value', 'p_adjusted', 'significant']])
+    st.write(f"**Variables con diferencias significativas:** {int(tabla.significant.sum())} "
+             f"de {len(tabla)} (α = {alpha}, corrección de {CORRECTIONS[correccion]})")
+
 # Información en el sidebar
 with st.sidebar:
     st.header("📊 Información")
@@ -0,0 +1,670 @@
+import numpy as np
+import pandas as pd
+
+# Versión del formato serializado de los agregados (to_dict / from_dict)
+FORMAT_VERSION = 2
+
+# Máximo de valores distintos (o centroides) por columna en los resúmenes
+# de cuantiles
+SKETCH_SIZE = 1024
+
+
+def _safe_divide(num, den):
+    """
+    División elemento a elemento que devuelve 0 donde el denominador es 0
+    """
+    num = np.asarray(num, dtype=float)
+    den = np.asarray(den, dtype=float)
+    return np.divide(num, den, out=np.zeros(np.broadcast(num, den).shape), where=den > 0)
+
+
+def _chan_merge(n_a, mean_a, m2_a, n_b, mean_b, m2_b):
+    """
+    Combinar conteos, medias y sumas de cuadrados centradas de dos bloques
+    (fórmula de Chan et al., numéricamente estable)
+    """
+    n = n_a + n_b
+    delta = mean_b - mean_a
+    mean = mean_a + delta * _safe_divide(n_b, n)
+    m2 = m2_a + m2_b + delta ** 2 * _safe_divide(n_a * n_b, n)
+    return n, mean, m2
+
+
+def _higher_merge(n_a, m2_a, m3_a, m4_a, n_b, m2_b, m3_b, m4_b, delta):
+    """
+    Combinar las sumas de potencias centradas de orden 3 y 4 de dos bloques
+    (fórmulas de Pébay, generalización de Chan et al.)
+    """
+    n_a = np.asarray(n_a, dtype=float)
+    n_b = np.asarray(n_b, dtype=float)
+    n = n_a + n_b
+    m3 = (m3_a + m3_b
+          + delta ** 3 * _safe_divide(n_a * n_b * (n_a - n_b), n ** 2)
+          + 3 * delta * _safe_divide(n_a * m2_b - n_b * m2_a, n))
+    m4 = (m4_a + m4_b
+          + delta ** 4 * _safe_divide(n_a * n_b * (n_a ** 2 - n_a * n_b + n_b ** 2), n ** 3)
+          + 6 * delta ** 2 * _safe_divide(n_a ** 2 * m2_b + n_b ** 2 * m2_a, n ** 2)
+          + 4 * delta * _safe_divide(n_a * m3_b - n_b * m3_a, n))
+    return m3, m4
+
+
+class QuantileSketch:
+    """
+    Resumen combinable de la distribución de una columna para estimar
+    cuantiles con memoria acotada: conteos exactos por valor mientras haya
+    como máximo `max_size` valores distintos y, por encima, centroides
+    (media y conteo) que resultan de fusionar los valores más cercanos
+    """
+
+    def __init__(self, values, counts, exact=True, max_size=SKETCH_SIZE):
+        self.values = np.asarray(values, dtype=float)
+        self.counts = np.asarray(counts, dtype=np.int64)
+        self.exact = bool(exact)
+        self.max_size = int(max_size)
+        self._compress()
+
+    @classmethod
+    def from_array(cls, values, max_size=SKETCH_SIZE):
+        values = np.asarray(values, dtype=float)
+        unique, counts = np.unique(values[~np.isnan(values)], return_counts=True)
+        return cls(unique, counts, True, max_size)
+
+    def _compress(self):
+        """
+        Fusionar en una sola pasada los pares de vecinos más cercanos hasta
+        no superar `max_size` centroides
+        """
+        excess = len(self.values) - self.max_size
+        if excess <= 0:
+            return
+        gaps = np.diff(self.values)
+        merge = np.zeros(len(gaps), dtype=bool)
+        merge[np.argpartition(gaps, excess - 1)[:excess]] = True
+        groups = np.concatenate([[0], np.cumsum(~merge)])
+        counts = np.bincount(groups, weights=self.counts)
+        self.values = np.bincount(groups, weights=self.values * self.counts) / counts
+        self.counts = counts.astype(np.int64)
+        self.exact = False
+
+    @property
+    def n(self):
+        return int(self.counts.sum())
+
+    def merge(self, other):
+        values, inverse = np.unique(np.concatenate([self.values, other.values]), return_inverse=True)
+        counts = np.bincount(inverse, weights=np.concatenate([self.counts, other.counts]))
+        return QuantileSketch(values, counts, self.exact and other.exact,
+                              min(self.max_size, other.max_size))
+
+    def quantile(self, q):
+        """
+        Cuantiles con interpolación lineal entre observaciones ordenadas
+        (coincide con pandas mientras el resumen es exacto)
+        """
+        q = np.asarray(q, dtype=float)
+        n = self.n
+        if n == 0:
+            return np.full(q.shape, np.nan)
+        cumulative = np.cumsum(self.counts)
+        position = (n - 1) * q
+        lower = np.floor(position).astype(np.int64)
+        upper = np.minimum(lower + 1, n - 1)
+        x_lower = self.values[np.searchsorted(cumulative, lower, side='right')]
+        x_upper = self.values[np.searchsorted(cumulative, upper, side='right')]
+        return x_lower + (position - lower) * (x_upper - x_lower)
+
+    def to_dict(self):
+        return {
+            'values': self.values.tolist(),
+            'counts': self.counts.tolist(),
+            'exact': self.exact,
+            'max_size': self.max_size,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['values'], data['counts'], data['exact'], data['max_size'])
+
+
+class MomentStats:
+    """
+    Acumulador combinable de estadísticos por columna: n, media, sumas de
+    potencias centradas de orden 2 a 4 (Welford/Chan/Pébay), mínimo, máximo
+    y un resumen de cuantiles de memoria acotada.
+
+    Se construye por bloques con from_frame()/update(), se combina con
+    merge() y finalize() devuelve la tabla descriptiva; el resultado no
+    depende de cómo se repartieron las filas entre bloques.
+    """
+
+    def __init__(self, columns, n, mean, m2, minimum, maximum, m3=None, m4=None, sketches=None):
+        self.columns = list(columns)
+        self.n = np.asarray(n, dtype=np.int64)
+        self.mean = np.asarray(mean, dtype=float)
+        self.m2 = np.asarray(m2, dtype=float)
+        self.minimum = np.asarray(minimum, dtype=float)
+        self.maximum = np.asarray(maximum, dtype=float)
+        # Sin momentos de orden superior (fuentes antiguas) quedan como NaN
+        unknown = np.full(len(self.columns), np.nan)
+        self.m3 = unknown if m3 is None else np.asarray(m3, dtype=float)
+        self.m4 = unknown if m4 is None else np.asarray(m4, dtype=float)
+        self.sketches = None if sketches is None else list(sketches)
+
+    @classmethod
+    def from_frame(cls, data, columns=None):
+        """
+        Calcular los estadísticos de un bloque de datos
+        """
+        if columns is None:
+            columns = data.select_dtypes(include=[np.number]).columns
+        block = data[list(columns)].to_numpy(dtype=float)
+        present = ~np.isnan(block)
+        n = present.sum(axis=0)
+        mean = _safe_divide(np.where(present, block, 0.0).sum(axis=0), n)
+        deviation = np.where(present, block - mean, 0.0)
+        squares = deviation ** 2
+        return cls(
+            columns, n, mean, squares.sum(axis=0),
+            np.fmin.reduce(block, axis=0, initial=np.nan),
+            np.fmax.reduce(block, axis=0, initial=np.nan),
+            (squares * deviation).sum(axis=0),
+            (squares ** 2).sum(axis=0),
+            [QuantileSketch.from_array(block[:, i]) for i in range(block.shape[1])]
+        )
+
+    def merge(self, other):
+        """
+        Combinar con los estadísticos de otro bloque con las mismas columnas
+        """
+        if self.columns != other.columns:
+            raise ValueError("Los bloques deben tener las mismas columnas")
+        n, mean, m2 = _chan_merge(self.n, self.mean, self.m2, other.n, other.mean, other.m2)
+        m3, m4 = _higher_merge(self.n, self.m2, self.m3, self.m4,
+                               other.n, other.m2, other.m3, other.m4,
+                               other.mean - self.mean)
+        sketches = None
+        if self.sketches is not None and other.sketches is not None:
+            sketches = [a.merge(b) for a, b in zip(self.sketches, other.sketches)]
+        return MomentStats(
+            self.columns, n, mean, m2,
+            np.fmin(self.minimum, other.minimum),
+            np.fmax(self.maximum, other.maximum),
+            m3, m4, sketches
+        )
+
+    def update(self, data):
+        """
+        Incorporar un nuevo bloque de filas
+        """
+        merged = self.merge(MomentStats.from_frame(data, self.columns))
+        self.__dict__.update(merged.__dict__)
+        return self
+
+    def to_dict(self):
+        return {
+            'columns': self.columns,
+            'n': self.n.tolist(),
+            'mean': self.mean.tolist(),
+            'm2': self.m2.tolist(),
+            'm3': self.m3.tolist(),
+            'm4': self.m4.tolist(),
+            'minimum': self.minimum.tolist(),
+            'maximum': self.maximum.tolist(),
+            'sketches': None if self.sketches is None else [s.to_dict() for s in self.sketches],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketches = data.get('sketches')
+        return cls(data['columns'], data['n'], data['mean'], data['m2'],
+                   data['minimum'], data['maximum'], data.get('m3'), data.get('m4'),
+                   None if sketches is None else [QuantileSketch.from_dict(s) for s in sketches])
+
+    def select(self, columns):
+        """
+        Restringir los estadísticos a un subconjunto de columnas
+        """
+        idx = [self.columns.index(c) for c in columns]
+        return MomentStats(columns, self.n[idx], self.mean[idx], self.m2[idx],
+                           self.minimum[idx], self.maximum[idx], self.m3[idx], self.m4[idx],
+                           None if self.sketches is None else [self.sketches[i] for i in idx])
+
+    @property
+    def sum(self):
+        return self.n * self.mean
+
+    @property
+    def sumsq(self):
+        return self.m2 + self.n * self.mean ** 2
+
+    def var(self, ddof=1):
+        dof = self.n - ddof
+        return np.where(dof > 0, _safe_divide(self.m2, dof), np.nan)
+
+    def std(self, ddof=1):
+        return np.sqrt(self.var(ddof))
+
+    def skew(self):
+        """
+        Asimetría muestral corregida por sesgo (igual que pandas)
+        """
+        n = self.n.astype(float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            g1 = np.sqrt(n) * self.m3 / self.m2 ** 1.5
+            return np.where(n > 2, g1 * np.sqrt(n * (n - 1)) / (n - 2), np.nan)
+
+    def kurt(self):
+        """
+        Curtosis en exceso muestral corregida por sesgo (igual que pandas)
+        """
+        n = self.n.astype(float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            g2 = n * self.m4 / self.m2 ** 2 - 3
+            return np.where(n > 3, ((n + 1) * g2 + 6) * (n - 1) / ((n - 2) * (n - 3)), np.nan)
+
+    def quantile(self, q):
+        """
+        Cuantiles por columna (NaN si no hay resumen de cuantiles)
+        """
+        q = np.atleast_1d(np.asarray(q, dtype=float))
+        if self.sketches is None or not self.columns:
+            return np.full((len(q), len(self.columns)), np.nan)
+        return np.column_stack([s.quantile(q) for s in self.sketches])
+
+    def to_frame(self):
+        """
+        Tabla con el mismo formato que DataFrame.describe(), más asimetría y
+        curtosis
+        """
+        mean = np.where(self.n > 0, self.mean, np.nan)
+        quartiles = self.quantile([0.25, 0.5, 0.75])
+        return pd.DataFrame(
+            [self.n.astype(float), mean, self.std(), self.minimum, *quartiles, self.maximum,
+             self.skew(), self.kurt()],
+            index=['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max', 'skew', 'kurt'],
+            columns=self.columns
+        )
+
+    def finalize(self):
+        """
+        Tabla descriptiva final del acumulador
+        """
+        return self.to_frame()
+
+
+class CrossProducts:
+    """
+    Medias y matriz de productos cruzados centrados de varias columnas,
+    calculadas sobre las filas completas
+    """
+
+    def __init__(self, columns, n, mean, comoment):
+        self.columns = list(columns)
+        self.n = int(n)
+        self.mean = np.asarray(mean, dtype=float)
+        self.comoment = np.asarray(comoment, dtype=float)
+
+    @classmethod
+    def from_frame(cls, data, columns=None):
+        """
+        Calcular los productos cruzados de un bloque de datos
+        """
+        if columns is None:
+            columns = data.select_dtypes(include=[np.number]).columns
+        X = data[list(columns)].dropna().to_numpy(dtype=float)
+        n = X.shape[0]
+        mean = X.mean(axis=0) if n else np.zeros(X.shape[1])
+        Xc = X - mean
+        return cls(columns, n, mean, Xc.T @ Xc)
+
+    def merge(self, other):
+        """
+        Combinar con los productos cruzados de otro bloque
+        """
+        if self.columns != other.columns:
+            raise ValueError("Los bloques deben tener las mismas columnas")
+        n = self.n + other.n
+        if n == 0:
+            return self
+        delta = other.mean - self.mean
+        mean = self.mean + delta * other.n / n
+        comoment = self.comoment + other.comoment + np.outer(delta, delta) * self.n * other.n / n
+        return CrossProducts(self.columns, n, mean, comoment)
+
+    def to_dict(self):
+        return {
+            'columns': self.columns,
+            'n': self.n,
+            'mean': self.mean.tolist(),
+            'comoment': self.comoment.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        comoment = np.asarray(data['comoment'], dtype=float).reshape(len(data['columns']), -1)
+        return cls(data['columns'], data['n'], data['mean'], comoment)
+
+    def select(self, columns):
+        """
+        Restringir la matriz a un subconjunto de columnas
+        """
+        idx = [self.columns.index(c) for c in columns]
+        return CrossProducts(columns, self.n, self.mean[idx], self.comoment[np.ix_(idx, idx)])
+
+    @property
+    def sums(self):
+        """Vector de sumas ΣX"""
+        return self.n * self.mean
+
+    @property
+    def raw(self):
+        """Matriz de productos cruzados sin centrar ΣXY"""
+        return self.comoment + self.n * np.outer(self.mean, self.mean)
+
+    def cov(self, ddof=1):
+        return pd.DataFrame(self.comoment / (self.n - ddof), index=self.columns, columns=self.columns)
+
+    def corr(self):
+        d = np.sqrt(np.diag(self.comoment))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            r = self.comoment / np.outer(d, d)
+        return pd.DataFrame(r, index=self.columns, columns=self.columns)
+
+
+class GroupedMoments:
+    """
+    Estadísticos suficientes por nivel de una columna de agrupación
+    (matrices de niveles × columnas)
+    """
+
+    def __init__(self, by, levels, columns, n, mean, m2):
+        self.by = by
+        self.levels = pd.Index(levels)
+        self.columns = list(columns)
+        self.n = np.asarray(n, dtype=np.int64).reshape(len(self.levels), len(self.columns))
+        self.mean = np.asarray(mean, dtype=float).reshape(self.n.shape)
+        self.m2 = np.asarray(m2, dtype=float).reshape(self.n.shape)
+
+    @classmethod
+    def from_frame(cls, data, by, columns=None):
+        """
+        Calcular los estadísticos por grupo de un bloque de datos con
+        np.bincount sobre los códigos de grupo (todas las columnas a la vez)
+        """
+        if columns is None:
+            columns = data.select_dtypes(include=[np.number]).columns.drop(by, errors='ignore')
+        codes, levels = pd.factorize(data[by], sort=True)
+        X = data[list(columns)].to_numpy(dtype=float)
+        shape = (len(levels), X.shape[1])
+
+        # Celda (grupo, columna) de cada valor; se descartan faltantes
+        valid = (codes >= 0)[:, None] & ~np.isnan(X)
+        cells = (codes[:, None] * shape[1] + np.arange(shape[1]))[valid]
+        size = shape[0] * shape[1]
+
+        n = np.bincount(cells, minlength=size).reshape(shape)
+        mean = _safe_divide(np.bincount(cells, weights=X[valid], minlength=size).reshape(shape), n)
+        deviation = X - mean[np.where(codes >= 0, codes, 0)]
+        m2 = np.bincount(cells, weights=deviation[valid] ** 2, minlength=size).reshape(shape)
+        return cls(by, levels, columns, n, mean, m2)
+
+    def _aligned(self, levels):
+        """
+        Reindexar las matrices a un conjunto de niveles (ceros si faltan)
+        """
+        pos = self.levels.get_indexer(levels)
+        present = (pos >= 0)[:, None]
+        take = np.where(pos >= 0, pos, 0)
+        return (np.where(present, self.n[take], 0),
+                np.where(present, self.mean[take], 0.0),
+                np.where(present, self.m2[take], 0.0))
+
+    def merge(self, other):
+        """
+        Combinar con los estadísticos por grupo de otro bloque
+        """
+        if self.by != other.by or self.columns != other.columns:
+            raise ValueError("Los bloques deben tener la misma agrupación y columnas")
+        try:
+            levels = self.levels.union(other.levels)
+        except TypeError:
+            levels = self.levels.append(other.levels).unique()
+        n, mean, m2 = _chan_merge(*self._aligned(levels), *other._aligned(levels))
+        return GroupedMoments(self.by, levels, self.columns, n, mean, m2)
+
+    def to_dict(self):
+        return {
+            'by': self.by,
+            'levels': self.levels.tolist(),
+            'columns': self.columns,
+            'n': self.n.tolist(),
+            'mean': self.mean.tolist(),
+            'm2': self.m2.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['by'], data['levels'], data['columns'],
+                   data['n'], data['mean'], data['m2'])
+
+    def select(self, columns):
+        """
+        Restringir los estadísticos a un subconjunto de columnas
+        """
+        idx = [self.columns.index(c) for c in columns]
+        return GroupedMoments(self.by, self.levels, columns,
+                              self.n[:, idx], self.mean[:, idx], self.m2[:, idx])
+
+    @property
+    def sum(self):
+        return self.n * self.mean
+
+    def var(self, ddof=1):
+        dof = self.n - ddof
+        return np.where(dof > 0, _safe_divide(self.m2, dof), np.nan)
+
+    def std(self, ddof=1):
+        return np.sqrt(self.var(ddof))
+
+    def frame(self, stat='mean'):
+        """
+        Devolver un estadístico ('n', 'mean', 'var', 'std') como DataFrame
+        """
+        values = {
+            'n': lambda: self.n,
+            'mean': lambda: np.where(self.n > 0, self.mean, np.nan),
+            'var': self.var,
+            'std': self.std,
+        }[stat]()
+        return pd.DataFrame(values, index=self.levels.rename(self.by), columns=self.columns)
+
+
+def _merge_tallies(a, b):
+    """
+    Sumar dos tablas de frecuencias alineando categorías
+    """
+    return a.add(b, fill_value=0).astype(np.int64)
+
+
+class SurveyAggregates:
+    """
+    Agregados combinables de una encuesta: momentos por columna, productos
+    cruzados, momentos por grupo y frecuencias de las columnas categóricas.
+
+    Permite calcular medias, varianzas, intervalos y estadísticos de prueba
+    sin tener todas las filas en memoria.
+    """
+
+    def __init__(self, moments, cross, groups, tallies, rows=0):
+        self._moments = moments
+        self._cross = cross
+        self._groups = dict(groups)
+        self.tallies = dict(tallies)
+        self.rows = int(rows)
+
+    @classmethod
+    def from_frame(cls, data, columns=None, group_by=(), categorical=None):
+        """
+        Calcular los agregados de un bloque de datos
+        """
+        if columns is None:
+            columns = [c for c in data.select_dtypes(include=[np.number]).columns
+                       if c not in group_by]
+        columns = list(columns)
+        if categorical is None:
+            categorical = [c for c in data.columns
+                           if c not in columns and not pd.api.types.is_numeric_dtype(data[c])]
+        return cls(
+            MomentStats.from_frame(data, columns),
+            CrossProducts.from_frame(data, columns),
+            {by: GroupedMoments.from_frame(data, by, columns) for by in group_by},
+            {c: data[c].value_counts(sort=False).astype(np.int64) for c in categorical},
+            rows=len(data)
+        )
+
+    @property
+    def columns(self):
+        return self._moments.columns
+
+    @property
+    def group_by(self):
+        return list(self._groups)
+
+    def merge(self, other):
+        """
+        Combinar con los agregados de otro bloque
+        """
+        if set(self._groups) != set(other._groups) or set(self.tallies) != set(other.tallies):
+            raise ValueError("Los bloques deben tener las mismas agrupaciones")
+        return SurveyAggregates(
+            self._moments.merge(other._moments),
+            self._cross.merge(other._cross),
+            {by: g.merge(other._groups[by]) for by, g in self._groups.items()},
+            {c: _merge_tallies(t, other.tallies[c]) for c, t in self.tallies.items()},
+            rows=self.rows + other.rows
+        )
+
+    def to_dict(self):
+        """
+        Representación serializable en JSON de los agregados
+        """
+        return {
+            'format': FORMAT_VERSION,
+            'rows': self.rows,
+            'moments': self._moments.to_dict(),
+            'cross': self._cross.to_dict(),
+            'groups': {by: g.to_dict() for by, g in self._groups.items()},
+            'tallies': {
+                c: {'labels': [str(v) for v in t.index], 'counts': t.tolist()}
+                for c, t in self.tallies.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            MomentStats.from_dict(data['moments']),
+            CrossProducts.from_dict(data['cross']),
+            {by: GroupedMoments.from_dict(g) for by, g in data['groups'].items()},
+            {c: pd.Series(t['counts'], index=pd.Index(t['labels'], name=c), dtype=np.int64)
+             for c, t in data['tallies'].items()},
+            rows=data['rows']
+        )
+
+    def chunk(self, data):
+        """
+        Calcular los agregados de un bloque nuevo con la misma configuración
+        """
+        return SurveyAggregates.from_frame(data, self.columns, self.group_by, list(self.tallies))
+
+    def update(self, data):
+        """
+        Incorporar un nuevo bloque de filas
+        """
+        merged = self.merge(self.chunk(data))
+        self.__dict__.update(merged.__dict__)
+        return self
+
+    # Interfaz de fuente de agregados usada por StatisticalAnalyzer
+
+    def moments(self, columns=None):
+        return self._moments if columns is None else self._moments.select(list(columns))
+
+    def cross_products(self, columns=None):
+        return self._cross if columns is None else self._cross.select(list(columns))
+
+    def grouped_moments(self, columns, by):
+        if by not in self._groups:
+            raise KeyError(f"No se calcularon agregados agrupados por '{by}'")
+        groups = self._groups[by]
+        return groups if columns is None else groups.select(list(columns))
+
+    def describe(self, columns=None):
+        return self.moments(columns).to_frame()
+
+    # Consultas de conveniencia para las páginas
+
+    def summary(self, column):
+        """
+        Tamaño, suma, media, varianza y desviación estándar muestrales de una columna
+        """
+        m = self._moments.select([column])
+        return {
+            'n': int(m.n[0]),
+            'sum': float(m.sum[0]),
+            'mean': float(m.mean[0]),
+            'var': float(m.var()[0]),
+            'std': float(m.std()[0])
+        }
+
+    def group_summary(self, column, by):
+        """
+        Tabla por nivel de `by` con tamaño, suma, media, varianza y desviación
+        estándar muestrales de una columna
+        """
+        g = self.grouped_moments([column], by)
+        return pd.DataFrame({
+            'n': g.n[:, 0],
+            'sum': g.sum[:, 0],
+            'mean': g.mean[:, 0],
+            'var': g.var()[:, 0],
+            'std': g.std()[:, 0]
+        }, index=g.levels.rename(by))
+
+    def regression_sums(self, x, y):
+        """
+        Sumatorias de la regresión de `y` sobre `x` (filas completas): ΣX, ΣY,
+        ΣXY, ΣX², ΣY² y las sumas de cuadrados centradas Sxx, Sxy, Syy
+        """
+        c = self._cross.select([x, y])
+        raw, sums = c.raw, c.sums
+        return {
+            'n': c.n,
+            'sum_x': float(sums[0]),
+            'sum_y': float(sums[1]),
+            'sum_xy': float(raw[0, 1]),
+            'sum_x2': float(raw[0, 0]),
+            'sum_y2': float(raw[1, 1]),
+            'sxx': float(c.comoment[0, 0]),
+            'sxy': float(c.comoment[0, 1]),
+            'syy': float(c.comoment[1, 1])
+        }
+
+
+def aggregate_csv(path, columns=None, group_by=(), categorical=None, chunksize=100_000):
+    """
+    Leer un CSV por bloques y acumular sus agregados con memoria acotada
+    """
+    usecols = None
+    if columns is not None:
+        usecols = list(dict.fromkeys(list(columns) + list(group_by) + list(categorical or [])))
+
+    aggregates = None
+    for chunk in pd.read_csv(path, usecols=usecols, chunksize=chunksize):
+        if aggregates is None:
+            aggregates = SurveyAggregates.from_frame(chunk, columns, group_by, categorical)
+        else:
+            aggregates.update(chunk)
+    if aggregates is None:
+        raise ValueError(f"El archivo {path} no contiene filas")
+    return aggregates
@@ -1,9 +1,14 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 import pandas as pd
 import numpy as np
 from scipy import stats
+from src.data_loader import load_numeric_survey
 
 # Leer datos
-df = pd.read_csv('../data/encuesta_recreacion_numerica.csv')
+df = load_numeric_survey()
 
 # Calcular estadísticos para la edad
 edad_media = df['Edad'].mean()
@@ -1,61 +1,519 @@
+import inspect
+
 import pandas as pd
 import numpy as np
 from scipy import stats
 
+from src import confidence as ci
+from src.aggregates import GroupedMoments, MomentStats
+from src.correlation import correlation_matrix, top_correlations, top_pairs
+from src.multiple_testing import correct_table
+from src.ranks import kendall_matrix, spearman_matrix
+from src.resampling import bootstrap, permutation_test
+from src.results import IntervalTable, ResultTable, concat, constant_label
+
+
+def _moments(data, columns):
+    """
+    Obtener los momentos por columna de un DataFrame o de una fuente de
+    agregados (SurveyAggregates, SQLiteSource)
+    """
+    if isinstance(data, pd.DataFrame):
+        return MomentStats.from_frame(data, columns)
+    return data.moments(columns)
+
+
+def _grouped_moments(data, columns, group_column):
+    """
+    Obtener los momentos por grupo de un DataFrame o de una fuente de agregados
+    """
+    if isinstance(data, pd.DataFrame):
+        return GroupedMoments.from_frame(data, group_column, columns)
+    return data.grouped_moments(columns, group_column)
+
+
+# Límites de n para la elección automática de la prueba de normalidad:
+# Shapiro-Wilk pierde precisión por encima de 5000 observaciones
+SHAPIRO_MAX_N = 5000
+DAGOSTINO_MAX_N = 100_000
+
+NORMALITY_TESTS = {
+    'shapiro': 'Shapiro-Wilk',
+    'dagostino': "D'Agostino-Pearson",
+    'anderson': 'Anderson-Darling',
+    'jarque_bera': 'Jarque-Bera',
+}
+
+
+def _dagostino_pearson(n, g1, b2):
+    """
+    Prueba K² de D'Agostino-Pearson a partir de n, la asimetría g1 y la
+    curtosis b2 (mismas fórmulas que scipy.stats.normaltest)
+    """
+    n = np.where(n < 8, np.nan, n)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Prueba de asimetría
+        y = g1 * np.sqrt((n + 1) * (n + 3) / (6.0 * (n - 2)))
+        beta2 = 3.0 * (n ** 2 + 27 * n - 70) * (n + 1) * (n + 3) / \
+            ((n - 2.0) * (n + 5) * (n + 7) * (n + 9))
+        w2 = -1 + np.sqrt(2 * (beta2 - 1))
+        delta = 1 / np.sqrt(0.5 * np.log(w2))
+        alpha = np.sqrt(2.0 / (w2 - 1))
+        y = np.where(y == 0, 1.0, y)
+        z_skew = delta * np.log(y / alpha + np.sqrt((y / alpha) ** 2 + 1))
+
+        # Prueba de curtosis
+        mean_b2 = 3.0 * (n - 1) / (n + 1)
+        var_b2 = 24.0 * n * (n - 2) * (n - 3) / ((n + 1) ** 2 * (n + 3) * (n + 5))
+        x = (b2 - mean_b2) / np.sqrt(var_b2)
+        sqrt_beta1 = 6.0 * (n * n - 5 * n + 2) / ((n + 7) * (n + 9)) * \
+            np.sqrt(6.0 * (n + 3) * (n + 5) / (n * (n - 2) * (n - 3)))
+        a = 6.0 + 8.0 / sqrt_beta1 * (2.0 / sqrt_beta1 + np.sqrt(1 + 4.0 / sqrt_beta1 ** 2))
+        denom = 1 + x * np.sqrt(2 / (a - 4.0))
+        term = np.sign(denom) * np.where(denom == 0, np.nan, ((1 - 2.0 / a) / np.abs(denom)) ** (1 / 3))
+        z_kurt = (1 - 2 / (9.0 * a) - term) / np.sqrt(2 / (9.0 * a))
+
+    k2 = z_skew ** 2 + z_kurt ** 2
+    return k2, stats.chi2.sf(k2, 2)
+
+
+def _jarque_bera(n, g1, b2):
+    """
+    Prueba de Jarque-Bera a partir de n, la asimetría g1 y la curtosis b2
+    """
+    jb = n / 6 * (g1 ** 2 + (b2 - 3) ** 2 / 4)
+    return jb, stats.chi2.sf(jb, 2)
+
+
+def _anderson_darling(values):
+    """
+    Prueba de Anderson-Darling con el valor p interpolado en la tabla de
+    valores críticos (acotado a [0.01, 0.15])
+    """
+    if 'method' in inspect.signature(stats.anderson).parameters:
+        result = stats.anderson(values, 'norm', method='interpolate')
+        return result.statistic, result.pvalue
+    # SciPy < 1.17 no tiene el parámetro method ni devuelve el valor p:
+    # se interpola en los valores críticos, igual que 'interpolate'
+    result = stats.anderson(values, 'norm')
+    p_value = np.interp(result.statistic, result.critical_values, result.significance_level / 100)
+    return result.statistic, float(p_value)
+
+
 class StatisticalAnalyzer:
     def __init__(self):
         pass
-    
+
     def descriptive_stats(self, data, columns=None):
         """
-        Calcular estadísticas descriptivas básicas
+        Calcular estadísticas descriptivas básicas (formato de describe(),
+        más asimetría y curtosis) con acumuladores combinables, de modo que
+        el resultado es el mismo para un DataFrame o para agregados
+        calculados por bloques
         """
-        if columns is None:
-            columns = data.select_dtypes(include=[np.number]).columns
-        return data[columns].describe()
-    
-    def normality_test(self, data, column):
+        return _moments(data, columns).finalize()
+
+    def normality_test(self, data, column, method='shapiro'):
         """
-        Realizar prueba de normalidad (Shapiro-Wilk)
+        Realizar prueba de normalidad (Shapiro-Wilk por defecto; ver
+        normality_table para los demás métodos)
         """
-        statistic, p_value = stats.shapiro(data[column])
+        table = self.normality_table(data, [column], method=method)
+        p_value = table['p_value'][0]
         return {
-            'test': 'Shapiro-Wilk',
-            'statistic': statistic,
+            'test': table['test'][0],
+            'statistic': table['statistic'][0],
             'p_value': p_value,
             'is_normal': p_value > 0.05
         }
-    
-    def correlation_analysis(self, data, method='pearson'):
+
+    def normality_table(self, data, columns=None, method='auto', sample_size=None, seed=0):
+        """
+        Pruebas de normalidad de varias columnas en una sola tabla.
+
+        Con method='auto' el método se elige según n: Shapiro-Wilk hasta
+        SHAPIRO_MAX_N observaciones, D'Agostino-Pearson hasta
+        DAGOSTINO_MAX_N y Jarque-Bera por encima. Las pruebas basadas en
+        momentos se calculan vectorizadas a partir de MomentStats (también
+        desde agregados); g1 y g2 son la asimetría y la curtosis en exceso
+        muestrales. Con sample_size se usa una submuestra reproducible de
+        filas (semilla seed).
+        """
+        if isinstance(data, pd.DataFrame):
+            if columns is None:
+                columns = data.select_dtypes(include=[np.number]).columns
+            columns = list(columns)
+            if sample_size is not None and len(data) > sample_size:
+                rng = np.random.default_rng(seed)
+                data = data.iloc[np.sort(rng.choice(len(data), sample_size, replace=False))]
+        elif method in ('shapiro', 'anderson'):
+            raise ValueError(f"La prueba '{method}' necesita los datos; desde agregados use "
+                             "'dagostino' o 'jarque_bera'")
+        elif sample_size is not None:
+            raise ValueError("sample_size necesita los datos; no se puede submuestrear "
+                             "desde agregados")
+
+        moments = _moments(data, columns)
+        n = moments.n.astype(float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            g1 = np.sqrt(n) * moments.m3 / moments.m2 ** 1.5
+            b2 = n * moments.m4 / moments.m2 ** 2
+
+        if method == 'auto':
+            chosen = np.where(n <= DAGOSTINO_MAX_N, 'dagostino', 'jarque_bera')
+            if isinstance(data, pd.DataFrame):
+                chosen = np.where(n <= SHAPIRO_MAX_N, 'shapiro', chosen)
+        elif method in NORMALITY_TESTS:
+            chosen = np.full(len(moments.columns), method)
+        else:
+            raise ValueError(f"Método de normalidad desconocido: '{method}'")
+
+        statistic, p_value = np.full(len(n), np.nan), np.full(len(n), np.nan)
+        for name, function in (('dagostino', _dagostino_pearson), ('jarque_bera', _jarque_bera)):
+            idx = chosen == name
+            if idx.any():
+                statistic[idx], p_value[idx] = function(n[idx], g1[idx], b2[idx])
+        for i in np.flatnonzero(np.isin(chosen, ['shapiro', 'anderson'])):
+            values = data[moments.columns[i]].dropna().to_numpy(dtype=float)
+            if len(values) < 3:
+                continue
+            if chosen[i] == 'shapiro':
+                statistic[i], p_value[i] = stats.shapiro(values)
+            else:
+                statistic[i], p_value[i] = _anderson_darling(values)
+
+        return ResultTable.from_arrays(
+            test=pd.Categorical.from_codes(pd.Index(list(NORMALITY_TESTS)).get_indexer(chosen),
+                                           list(NORMALITY_TESTS.values())),
+            statistic=statistic,
+            p_value=p_value,
+            # K² y JB se comparan con una χ² de 2 grados de libertad
+            df=np.where(np.isin(chosen, ['dagostino', 'jarque_bera']), 2.0, np.nan),
+            column=pd.Categorical(moments.columns),
+            n=moments.n,
+            g1=g1,
+            g2=b2 - 3,
+        )
+
+    def correlation_analysis(self, data, method='pearson', dtype=np.float64, top_k=None):
         """
-        Realizar análisis de correlación
+        Realizar análisis de correlación. La correlación de Pearson de un
+        DataFrame se calcula por bloques en varios hilos (src.correlation),
+        y las de Spearman y Kendall reutilizan los rangos en caché
+        (src.ranks); con top_k se devuelven solo los top_k pares más fuertes en lugar de
+        la matriz completa
         """
-        numeric_data = data.select_dtypes(include=[np.number])
-        return numeric_data.corr(method=method)
-    
+        if not isinstance(data, pd.DataFrame):
+            if method != 'pearson':
+                raise ValueError("Desde agregados solo se puede calcular la correlación de Pearson")
+            matrix = data.cross_products().corr()
+        elif method == 'pearson':
+            if top_k is not None:
+                return top_correlations(data, top_k, dtype=dtype)
+            return correlation_matrix(data, dtype=dtype)
+        elif method == 'spearman':
+            matrix = spearman_matrix(data)
+        elif method == 'kendall':
+            matrix = kendall_matrix(data)
+        else:
+            matrix = data.select_dtypes(include=[np.number]).corr(method=method)
+        if top_k is not None:
+            return top_pairs(matrix, top_k)
+        return matrix
+
     def t_test(self, data, column, group_column):
         """
         Realizar prueba t de Student para dos grupos independientes
         """
-        groups = data[column].groupby(data[group_column])
-        group1, group2 = [group for _, group in groups]
-        t_stat, p_value = stats.ttest_ind(group1, group2)
+        groups = _grouped_moments(data, [column], group_column)
+        if len(groups.levels) != 2:
+            raise ValueError(
+                f"La prueba t requiere exactamente dos grupos en '{group_column}' "
+                f"(se encontraron {len(groups.levels)})"
+            )
+        n, mean, std = groups.n[:, 0], groups.mean[:, 0], groups.std()[:, 0]
+        t_stat, p_value = stats.ttest_ind_from_stats(mean[0], std[0], n[0], mean[1], std[1], n[1])
         return {
             'test': 't-test',
             't_statistic': t_stat,
             'p_value': p_value,
             'significant': p_value < 0.05
         }
-    
+
+    def t_test_batch(self, data, columns, group_column):
+        """
+        Pruebas t de Student (varianzas iguales) y de Welch para todos los
+        pares de grupos de todas las columnas, en una sola pasada vectorizada
+        sobre los estadísticos suficientes por grupo
+        """
+        groups = _grouped_moments(data, columns, group_column)
+        first, second = np.triu_indices(len(groups.levels), k=1)
+        n1, n2 = groups.n[first].astype(float), groups.n[second].astype(float)
+        mean1, mean2 = groups.mean[first], groups.mean[second]
+        var = groups.var()
+        var1, var2 = var[first], var[second]
+        diff = mean1 - mean2
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            df_student = n1 + n2 - 2
+            pooled = ((n1 - 1) * var1 + (n2 - 1) * var2) / df_student
+            t_student = diff / np.sqrt(pooled * (1 / n1 + 1 / n2))
+            cohen_d = diff / np.sqrt(pooled)
+
+            a, b = var1 / n1, var2 / n2
+            t_welch = diff / np.sqrt(a + b)
+            df_welch = (a + b) ** 2 / (a ** 2 / (n1 - 1) + b ** 2 / (n2 - 1))
+
+        p_student = 2 * stats.t.sf(np.abs(t_student), df_student)
+        p_welch = 2 * stats.t.sf(np.abs(t_welch), df_welch)
+
+        # Una fila por (columna, par de grupos)
+        pair, column = np.meshgrid(np.arange(len(first)), np.arange(len(groups.columns)),
+                                   indexing='xy')
+        pair, column = pair.ravel(), column.ravel()
+        # Columna base: Student; Welch queda en columnas adicionales
+        return ResultTable.from_arrays(
+            test=constant_label('t-test', len(pair)),
+            statistic=t_student[pair, column],
+            p_value=p_student[pair, column],
+            df=df_student[pair, column],
+            effect_size=cohen_d[pair, column],
+            column=pd.Categorical.from_codes(column, list(groups.columns)),
+            group_1=groups.levels[first].to_numpy()[pair],
+            group_2=groups.levels[second].to_numpy()[pair],
+            n_1=groups.n[first][pair, column],
+            n_2=groups.n[second][pair, column],
+            mean_1=mean1[pair, column],
+            mean_2=mean2[pair, column],
+            t_welch=t_welch[pair, column],
+            df_welch=df_welch[pair, column],
+            p_welch=p_welch[pair, column],
+        )
+
+    def permutation_test(self, data, column, group_column, statistic='mean', **options):
+        """
+        Prueba de permutación de la diferencia de medias, medianas o
+        proporciones de `column` entre los dos grupos de `group_column`
+        (ver src.resampling.permutation_test para las opciones)
+        """
+        levels = np.sort(data[group_column].dropna().unique())
+        if len(levels) != 2:
+            raise ValueError(
+                f"La prueba de permutación requiere exactamente dos grupos en '{group_column}' "
+                f"(se encontraron {len(levels)})"
+            )
+        x = data.loc[data[group_column] == levels[0], column]
+        y = data.loc[data[group_column] == levels[1], column]
+        result = permutation_test(x, y, statistic, **options)
+        result['significant'] = result['p_value'] < 0.05
+        return result
+
+    def correlation_permutation_test(self, data, x, y, **options):
+        """
+        Prueba de permutación de la correlación de Pearson entre dos columnas
+        """
+        result = permutation_test(data[x], data[y], 'correlation', **options)
+        result['significant'] = result['p_value'] < 0.05
+        return result
+
+    def bootstrap_interval(self, data, columns, statistic='mean', **options):
+        """
+        Intervalos bootstrap (percentil, básico y BCa) de un estadístico de
+        una columna ('mean', 'median') o de dos columnas x, y ('ratio',
+        'slope', 'intercept'); ver src.resampling.bootstrap
+        """
+        if isinstance(columns, str):
+            columns = [columns]
+        values = data[list(columns)].to_numpy(dtype=float)
+        return bootstrap(values[:, 0] if len(columns) == 1 else values, statistic, **options)
+
     def anova(self, data, dependent_var, group_var):
         """
         Realizar análisis de varianza (ANOVA)
         """
-        groups = data[dependent_var].groupby(data[group_var])
-        f_stat, p_value = stats.f_oneway(*[group for _, group in groups])
+        table = self.anova_batch(data, [dependent_var], group_var)
+        f_stat, p_value = table['statistic'][0], table['p_value'][0]
         return {
             'test': 'ANOVA',
             'f_statistic': f_stat,
             'p_value': p_value,
             'significant': p_value < 0.05
         }
+
+    def anova_batch(self, data, columns, group_var):
+        """
+        ANOVA de un factor para varias variables dependientes a la vez, a
+        partir de los conteos, medias y sumas de cuadrados por grupo (de un
+        DataFrame o de agregados precalculados)
+        """
+        groups = _grouped_moments(data, columns, group_var)
+        n, mean = groups.n.astype(float), groups.mean
+        total = n.sum(axis=0)
+        k = np.count_nonzero(groups.n, axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            grand_mean = (n * mean).sum(axis=0) / total
+            ss_between = (n * (mean - grand_mean) ** 2).sum(axis=0)
+            ss_within = groups.m2.sum(axis=0)
+            df_between, df_within = k - 1, total - k
+            f_stat = (ss_between / df_between) / (ss_within / df_within)
+            eta_squared = ss_between / (ss_between + ss_within)
+        return ResultTable.from_arrays(
+            test=constant_label('ANOVA', len(groups.columns)),
+            statistic=f_stat,
+            p_value=stats.f.sf(f_stat, df_between, df_within),
+            df=df_between,
+            effect_size=eta_squared,
+            column=pd.Categorical(groups.columns),
+            groups=k,
+            n=total.astype(np.int64),
+            ss_between=ss_between,
+            ss_within=ss_within,
+            df_within=df_within,
+        )
+
+    def adjust_pvalues(self, table, method='holm', alpha=0.05, column='p_value'):
+        """
+        Corregir por comparaciones múltiples los valores p de una tabla de
+        resultados (ResultTable de t_test_batch, anova_batch,
+        normality_table..., o un DataFrame)
+        """
+        return correct_table(table, method, alpha, column)
+
+    def mean_confidence_interval(self, data, column, confidence=0.95, sigma=None):
+        """
+        Calcular el intervalo de confianza para la media (t de Student, o Z si
+        se conoce la desviación estándar poblacional sigma)
+        """
+        moments = _moments(data, [column])
+        n, mean = moments.n[0], moments.mean[0]
+        if sigma is None:
+            lower, upper = ci.t_mean(mean, moments.std()[0], n, confidence)
+        else:
+            lower, upper = ci.z_mean(mean, sigma, n, confidence)
+        return {
+            'n': int(n),
+            'mean': mean,
+            'lower': lower,
+            'upper': upper,
+            'confidence': confidence
+        }
+
+    def stratified_intervals(self, data, column, by, method='t_mean', confidence=0.95, sigma=None):
+        """
+        Intervalo de confianza de `column` para cada nivel de `by` (media
+        con Z o con t, proporción de una columna 0/1 o varianza) a partir
+        de un solo cálculo agrupado de estadísticos suficientes, más la fila
+        'Total' obtenida combinando los grupos. Devuelve una IntervalTable
+        con columnas group, n, estimate, lower y upper
+        """
+        groups = _grouped_moments(data, [column], by)
+        n, mean, m2 = groups.n[:, 0].astype(float), groups.mean[:, 0], groups.m2[:, 0]
+
+        # Total a partir de los grupos (descomposición de la suma de cuadrados)
+        total = n.sum()
+        grand_mean = (n * mean).sum() / total
+        n = np.append(n, total)
+        mean = np.append(mean, grand_mean)
+        m2 = np.append(m2, m2.sum() + (n[:-1] * (mean[:-1] - grand_mean) ** 2).sum())
+        with np.errstate(divide='ignore', invalid='ignore'):
+            var = m2 / (n - 1)
+
+        if method == 'z_mean':
+            estimate = mean
+            lower, upper = ci.z_mean(mean, np.sqrt(var) if sigma is None else sigma, n, confidence)
+        elif method == 't_mean':
+            estimate = mean
+            lower, upper = ci.t_mean(mean, np.sqrt(var), n, confidence)
+        elif method == 'proportion':
+            estimate = mean
+            lower, upper = ci.proportion(mean, n, confidence)
+        elif method == 'variance':
+            estimate = var
+            lower, upper = ci.variance(var, n, confidence)
+        else:
+            raise ValueError(f"Método de intervalo desconocido: '{method}'")
+
+        return IntervalTable({
+            'group': pd.Categorical([str(level) for level in groups.levels] + ['Total']),
+            'n': n.astype(np.int64),
+            'estimate': np.asarray(estimate, dtype=float),
+            'lower': np.asarray(lower, dtype=float),
+            'upper': np.asarray(upper, dtype=float),
+        })
+
+    def confidence_intervals(self, data, columns, confidences=(0.90, 0.95, 0.99), by=None,
+                             proportions=(), sigma=None):
+        """
+        Todos los intervalos de confianza de varias columnas y niveles en una
+        sola pasada vectorizada (src.confidence): media con Z (sigma
+        conocida; por defecto la desviación muestral) y con t, varianza con
+        χ², y proporción para las columnas 0/1 de `proportions`.
+
+        Con `by` se calculan además los mismos intervalos por grupo y las
+        diferencias de medias (Welch) y de proporciones entre cada par de
+        grupos. Devuelve una IntervalTable larga: method, column, group,
+        confidence, estimate, lower, upper.
+        """
+        columns, proportions = list(columns), list(proportions)
+        levels = np.atleast_1d(np.asarray(confidences, dtype=float))
+        rows = []
+
+        def add(method, column, group, estimate, interval):
+            lower, upper = interval
+            shape = np.broadcast_shapes(np.shape(lower), np.shape(estimate[..., None]))
+            rows.append(IntervalTable({
+                'method': constant_label(method, int(np.prod(shape))),
+                'column': np.broadcast_to(np.asarray(column, dtype=object)[..., None], shape).ravel(),
+                'group': np.broadcast_to(np.asarray(group, dtype=object)[..., None], shape).ravel(),
+                'confidence': np.broadcast_to(levels, shape).ravel(),
+                'estimate': np.broadcast_to(estimate[..., None], shape).ravel(),
+                'lower': np.broadcast_to(lower, shape).ravel(),
+                'upper': np.broadcast_to(upper, shape).ravel(),
+            }))
+
+        def add_all(column, group, n, mean, std, var):
+            # n, mean, ... con forma (..., columnas); el nivel va en el último eje
+            n, mean, std, var = (np.asarray(a, dtype=float) for a in (n, mean, std, var))
+            k = n[..., None]
+            known = std if sigma is None else np.broadcast_to(sigma, std.shape)
+            add('z_mean', column, group, mean, ci.z_mean(mean[..., None], known[..., None], k, levels))
+            add('t_mean', column, group, mean, ci.t_mean(mean[..., None], std[..., None], k, levels))
+            add('variance', column, group, var, ci.variance(var[..., None], k, levels))
+
+        def add_proportions(column, group, n, p):
+            add('proportion', column, group, p, ci.proportion(p[..., None], n[..., None], levels))
+
+        moments = _moments(data, columns)
+        add_all(moments.columns, 'Total', moments.n, moments.mean, moments.std(), moments.var())
+        if proportions:
+            share = _moments(data, proportions)
+            add_proportions(share.columns, 'Total', share.n, share.mean)
+
+        if by is not None:
+            groups = _grouped_moments(data, columns + proportions, by)
+            names = np.asarray(groups.columns, dtype=object)[None, :]
+            labels = groups.levels.to_numpy().astype(str).astype(object)[:, None]
+            measured = slice(0, len(columns))
+            shares = slice(len(columns), len(groups.columns))
+            n, mean, std, var = groups.n, groups.mean, groups.std(), groups.var()
+            add_all(names[:, measured], labels, n[:, measured], mean[:, measured],
+                    std[:, measured], var[:, measured])
+            if proportions:
+                add_proportions(names[:, shares], labels, n[:, shares], mean[:, shares])
+
+            # Diferencias entre cada par de grupos
+            first, second = np.triu_indices(len(groups.levels), k=1)
+            pair = (labels[first, 0] + ' − ' + labels[second, 0])[:, None]
+            n1, n2 = n[first][..., None], n[second][..., None]
+            m1, m2 = mean[first], mean[second]
+            s1, s2 = std[first][..., None], std[second][..., None]
+            add('mean_difference', names[:, measured], pair, (m1 - m2)[:, measured],
+                ci.mean_difference(m1[:, measured, None], s1[:, measured], n1[:, measured],
+                                   m2[:, measured, None], s2[:, measured], n2[:, measured],
+                                   levels, known_variance=False))
+            if proportions:
+                add('proportion_difference', names[:, shares], pair, (m1 - m2)[:, shares],
+                    ci.proportion_difference(m1[:, shares, None], n1[:, shares],
+                                             m2[:, shares, None], n2[:, shares], levels))
+
+        return concat(rows)
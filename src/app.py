@@ -1,7 +1,11 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from pathlib import Path
+from src.data_loader import load_survey
 
 # Configuración de la página
 st.set_page_config(
@@ -10,15 +14,8 @@ st.set_page_config(
     layout="wide"
 )
 
-# Función para cargar datos
-@st.cache_data
-def cargar_datos():
-    ruta_base = Path(__file__).parent.parent
-    ruta_datos = ruta_base / 'data' / 'encuesta_recreacion.csv'
-    return pd.read_csv(ruta_datos)
-
 # Cargar datos
-df = cargar_datos()
+df = load_survey('encuesta_recreacion.csv')
 
 # Título principal
 st.title("📊 Análisis de Encuesta de Recreación")
@@ -0,0 +1,160 @@
+import numpy as np
+import pandas as pd
+
+
+def _popcount(words):
+    """
+    Contar los bits activos de un arreglo de palabras uint64
+    """
+    if hasattr(np, 'bitwise_count'):
+        return int(np.bitwise_count(words).sum())
+    return int(np.unpackbits(words.view(np.uint8)).sum())
+
+
+class Bitmap:
+    """
+    Conjunto de filas representado como bits empaquetados en palabras de
+    64 bits (un bit por fila)
+    """
+
+    def __init__(self, words, size):
+        self.words = words
+        self.size = int(size)
+
+    @classmethod
+    def from_mask(cls, mask):
+        """
+        Construir el bitmap a partir de una máscara booleana
+        """
+        mask = np.asarray(mask, dtype=bool)
+        packed = np.packbits(mask, bitorder='little')
+        padding = (-len(packed)) % 8
+        if padding:
+            packed = np.concatenate([packed, np.zeros(padding, dtype=np.uint8)])
+        return cls(packed.view(np.uint64), len(mask))
+
+    @classmethod
+    def full(cls, size):
+        return cls.from_mask(np.ones(size, dtype=bool))
+
+    @classmethod
+    def empty(cls, size):
+        return cls(np.zeros((size + 63) // 64, dtype=np.uint64), size)
+
+    def _check(self, other):
+        if self.size != other.size:
+            raise ValueError("Los bitmaps deben referirse al mismo número de filas")
+
+    def __and__(self, other):
+        self._check(other)
+        return Bitmap(self.words & other.words, self.size)
+
+    def __or__(self, other):
+        self._check(other)
+        return Bitmap(self.words | other.words, self.size)
+
+    def __invert__(self):
+        return Bitmap(~self.words & Bitmap.full(self.size).words, self.size)
+
+    def count(self):
+        """
+        Número de filas del conjunto
+        """
+        return _popcount(self.words)
+
+    def to_mask(self):
+        return np.unpackbits(self.words.view(np.uint8), count=self.size, bitorder='little').astype(bool)
+
+    def rows(self):
+        """
+        Posiciones (para iloc) de las filas del conjunto
+        """
+        return np.flatnonzero(self.to_mask())
+
+
+class BitmapIndex:
+    """
+    Índice de bitmaps por valor de las columnas categóricas de un dataset.
+
+    Los filtros se expresan como un diccionario columna → valor o lista de
+    valores: se combinan con AND entre columnas y con OR dentro de cada lista.
+    """
+
+    def __init__(self, bitmaps, size):
+        self._bitmaps = bitmaps
+        self.size = int(size)
+
+    @classmethod
+    def from_frame(cls, frame, columns=None):
+        """
+        Construir el índice de las columnas indicadas (por defecto, todas las
+        categóricas) recorriendo cada columna una sola vez por categoría
+        """
+        if columns is None:
+            columns = [c for c in frame.columns if isinstance(frame[c].dtype, pd.CategoricalDtype)]
+        bitmaps = {}
+        for column in columns:
+            values = frame[column]
+            if not isinstance(values.dtype, pd.CategoricalDtype):
+                values = values.astype('category')
+            codes = values.cat.codes.to_numpy()
+            bitmaps[column] = {
+                label: Bitmap.from_mask(codes == k)
+                for k, label in enumerate(values.cat.categories)
+            }
+        return cls(bitmaps, len(frame))
+
+    @property
+    def columns(self):
+        return list(self._bitmaps)
+
+    def labels(self, column):
+        return list(self._bitmaps[column])
+
+    def bitmap(self, column, value):
+        """
+        Bitmap de las filas con `column == value`
+        """
+        if column not in self._bitmaps:
+            raise KeyError(f"La columna '{column}' no está indexada")
+        if value not in self._bitmaps[column]:
+            raise KeyError(f"'{value}' no es una categoría de '{column}'")
+        return self._bitmaps[column][value]
+
+    def filter(self, where=None):
+        """
+        Bitmap de las filas que cumplen todas las condiciones de `where`
+        """
+        result = Bitmap.full(self.size)
+        for column, values in (where or {}).items():
+            if isinstance(values, (list, tuple, set)):
+                selected = Bitmap.empty(self.size)
+                for value in values:
+                    selected = selected | self.bitmap(column, value)
+            else:
+                selected = self.bitmap(column, values)
+            result = result & selected
+        return result
+
+    def rows(self, where=None):
+        """
+        Posiciones de las filas que cumplen el filtro
+        """
+        return self.filter(where).rows()
+
+    def take(self, frame, where=None):
+        """
+        Subconjunto de `frame` (alineado con el índice) que cumple el filtro,
+        listo para pasarlo a StatisticalAnalyzer
+        """
+        return frame.iloc[self.rows(where)]
+
+    def counts(self, column, where=None):
+        """
+        Frecuencias de cada categoría de `column` dentro del filtro
+        """
+        base = self.filter(where)
+        return pd.Series(
+            {label: (bitmap & base).count() for label, bitmap in self._bitmaps[column].items()},
+            name=column, dtype=np.int64
+        )
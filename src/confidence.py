@@ -0,0 +1,76 @@
+import numpy as np
+
+from src.critical_values import chi2_ppf, norm_ppf, t_ppf
+
+# Todas las funciones aceptan escalares o arreglos y aplican broadcasting de
+# NumPy: por ejemplo, medias con forma (columnas, 1) y niveles de confianza
+# con forma (1, niveles) dan todos los intervalos en una sola llamada.
+# Devuelven (límite inferior, límite superior).
+
+
+def _upper_tail(confidence):
+    return 1 - (1 - np.asarray(confidence, dtype=float)) / 2
+
+
+def z_mean(mean, sigma, n, confidence=0.95):
+    """
+    Intervalo para la media con varianza conocida: x̄ ± z·σ/√n
+    """
+    error = norm_ppf(_upper_tail(confidence)) * np.asarray(sigma) / np.sqrt(n)
+    return mean - error, mean + error
+
+
+def t_mean(mean, std, n, confidence=0.95):
+    """
+    Intervalo para la media con varianza desconocida: x̄ ± t(n−1)·s/√n
+    """
+    n = np.asarray(n, dtype=float)
+    error = t_ppf(_upper_tail(confidence), n - 1) * np.asarray(std) / np.sqrt(n)
+    return mean - error, mean + error
+
+
+def proportion(p, n, confidence=0.95):
+    """
+    Intervalo de Wald para una proporción, recortado a [0, 1]
+    """
+    p = np.asarray(p, dtype=float)
+    error = norm_ppf(_upper_tail(confidence)) * np.sqrt(p * (1 - p) / n)
+    return np.maximum(p - error, 0.0), np.minimum(p + error, 1.0)
+
+
+def mean_difference(mean1, sd1, n1, mean2, sd2, n2, confidence=0.95, known_variance=True):
+    """
+    Intervalo para μ₁ − μ₂: con varianzas conocidas usa z; si no, t con los
+    grados de libertad de Welch
+    """
+    a = np.asarray(sd1, dtype=float) ** 2 / n1
+    b = np.asarray(sd2, dtype=float) ** 2 / n2
+    if known_variance:
+        critical = norm_ppf(_upper_tail(confidence))
+    else:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            df = (a + b) ** 2 / (a ** 2 / (np.asarray(n1) - 1) + b ** 2 / (np.asarray(n2) - 1))
+        critical = t_ppf(_upper_tail(confidence), df)
+    diff = np.asarray(mean1) - np.asarray(mean2)
+    error = critical * np.sqrt(a + b)
+    return diff - error, diff + error
+
+
+def proportion_difference(p1, n1, p2, n2, confidence=0.95):
+    """
+    Intervalo de Wald para p₁ − p₂, recortado a [−1, 1]
+    """
+    p1, p2 = np.asarray(p1, dtype=float), np.asarray(p2, dtype=float)
+    error = norm_ppf(_upper_tail(confidence)) * np.sqrt(p1 * (1 - p1) / n1 + p2 * (1 - p2) / n2)
+    diff = p1 - p2
+    return np.maximum(diff - error, -1.0), np.minimum(diff + error, 1.0)
+
+
+def variance(var, n, confidence=0.95):
+    """
+    Intervalo χ² para la varianza: ((n−1)s²/χ²₁₋α/₂, (n−1)s²/χ²α/₂)
+    """
+    df = np.asarray(n, dtype=float) - 1
+    upper_tail = _upper_tail(confidence)
+    scaled = df * np.asarray(var)
+    return scaled / chi2_ppf(upper_tail, df), scaled / chi2_ppf(1 - upper_tail, df)
@@ -0,0 +1,99 @@
+from functools import lru_cache
+
+import numpy as np
+from scipy import stats
+
+# Número máximo de valores críticos escalares que se recuerdan por distribución
+CACHE_SIZE = 4096
+
+# Tabla precalculada de los cuantiles más usados: colas de α comunes y
+# grados de libertad enteros de 1 a TABLE_MAX_DF
+TABLE_PROBABILITIES = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1,
+                       0.9, 0.95, 0.975, 0.99, 0.995, 0.999, 0.9995)
+TABLE_MAX_DF = 300
+
+# Decimales con los que se normaliza q: 1 - (1 - 0.95)/2 y 0.975 deben
+# dar la misma clave
+_DECIMALS = 12
+
+_probabilities = np.array(TABLE_PROBABILITIES)
+_table_df = np.arange(1, TABLE_MAX_DF + 1)
+_tables = {
+    't': stats.t.ppf(_probabilities[:, None], _table_df[None, :]),
+    'chi2': stats.chi2.ppf(_probabilities[:, None], _table_df[None, :]),
+}
+_table_row = {round(q, _DECIMALS): i for i, q in enumerate(TABLE_PROBABILITIES)}
+_norm_table = {round(q, _DECIMALS): float(z) for q, z in zip(TABLE_PROBABILITIES, stats.norm.ppf(_probabilities))}
+
+_distributions = {'t': stats.t, 'chi2': stats.chi2}
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _norm_cached(q):
+    return float(stats.norm.ppf(q))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _df_cached(name, q, df):
+    return float(_distributions[name].ppf(q, df))
+
+
+def _lookup(name, q, df):
+    """
+    Valor crítico escalar: primero la tabla, luego la caché LRU
+    """
+    q = round(float(q), _DECIMALS)
+    df = float(df)
+    row = _table_row.get(q)
+    if row is not None and df.is_integer() and 1 <= df <= TABLE_MAX_DF:
+        return float(_tables[name][row, int(df) - 1])
+    return _df_cached(name, q, df)
+
+
+def _vectorized(function, *arrays):
+    """
+    Evaluar un ppf sobre arreglos calculando una sola vez cada combinación
+    distinta de argumentos
+    """
+    arrays = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in arrays))
+    shape = arrays[0].shape
+    keys = np.stack([a.ravel() for a in arrays], axis=1)
+    unique, inverse = np.unique(keys, axis=0, return_inverse=True)
+    values = function(*unique.T)
+    return values[inverse.ravel()].reshape(shape)
+
+
+def norm_ppf(q):
+    """
+    Cuantil de la normal estándar (escalar memorizado o arreglo vectorizado)
+    """
+    if np.ndim(q) == 0:
+        q = round(float(q), _DECIMALS)
+        value = _norm_table.get(q)
+        return _norm_cached(q) if value is None else value
+    return _vectorized(stats.norm.ppf, q)
+
+
+def t_ppf(q, df):
+    """
+    Cuantil de la t de Student con df grados de libertad
+    """
+    if np.ndim(q) == 0 and np.ndim(df) == 0:
+        return _lookup('t', q, df)
+    return _vectorized(stats.t.ppf, q, df)
+
+
+def chi2_ppf(q, df):
+    """
+    Cuantil de la χ² con df grados de libertad
+    """
+    if np.ndim(q) == 0 and np.ndim(df) == 0:
+        return _lookup('chi2', q, df)
+    return _vectorized(stats.chi2.ppf, q, df)
+
+
+def cache_info():
+    """
+    Estadísticas de las cachés LRU (aciertos, fallos, tamaño)
+    """
+    return {'norm': _norm_cached.cache_info(), 't_chi2': _df_cached.cache_info()}
@@ -0,0 +1,514 @@
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.aggregates import FORMAT_VERSION, SurveyAggregates
+from src.bitmap_index import BitmapIndex
+from src.encoding import load_codebook
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+except ImportError:  # pyarrow es opcional: sin él se lee siempre el CSV
+    pa = None
+
+# Directorio de datos del proyecto (independiente del directorio de trabajo)
+DATA_DIR = Path(__file__).resolve().parent.parent / 'data'
+
+# Directorio de archivos columnares derivados de los CSV
+CACHE_DIR = DATA_DIR / '.cache'
+
+# Claves de los metadatos del archivo Arrow: hash del CSV de origen y
+# versión del libro de códigos con que se codificaron las categorías
+_DIGEST_KEY = b'source_digest'
+_CODEBOOK_KEY = b'codebook_version'
+
+# Versión del formato del archivo Arrow (cambia si cambian los tipos)
+_FORMAT_KEY = b'format_version'
+_FORMAT_VERSION = b'2'
+
+# Dataset de texto del que se deriva el dataset numérico
+SURVEY_FILE = 'encuesta_recreacion.csv'
+
+# Umbral de satisfacción alta usado en las proporciones (Satisfaccion ≥ 4)
+SATISFACCION_ALTA = 4
+
+# Columnas y agrupaciones de los agregados persistentes del dataset numérico.
+# Satisfaccion_Alta es el indicador 0/1 de satisfacción alta: su suma es el
+# número de éxitos y su media la proporción.
+AGGREGATE_COLUMNS = ['Edad', 'Frecuencia_Visitas', 'Importancia_Costo', 'Satisfaccion',
+                     'Preferencia', 'Satisfaccion_Alta']
+AGGREGATE_GROUPS = ['Genero', 'Importancia_Costo']
+
+# Con copy-on-write (pandas ≥ 2; activo por defecto desde pandas 3) las
+# copias superficiales que se entregan copian una columna antes de
+# modificarla, de modo que el DataFrame en caché nunca cambia
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
+# Caché compartida por todo el proceso: todas las sesiones y páginas de
+# Streamlit reciben el mismo DataFrame mientras el archivo no cambie.
+_cache = {}
+_lock = threading.Lock()
+
+# Agregados en memoria por archivo y cerrojo de las escrituras al CSV
+_aggregates = {}
+_append_lock = threading.Lock()
+
+
+def resolve_path(name):
+    """
+    Resolver el nombre de un dataset a una ruta absoluta dentro de data/
+    """
+    path = Path(name)
+    if not path.is_absolute():
+        path = DATA_DIR / path
+    return path
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """
+    Calcular el hash SHA-256 del contenido de un archivo
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _cache_stem(path):
+    """
+    Nombre base de los archivos derivados de un CSV: los archivos de
+    subdirectorios de data/ (particiones) incluyen el directorio para no
+    colisionar entre datasets
+    """
+    path = Path(path)
+    try:
+        relative = path.resolve().relative_to(DATA_DIR)
+    except ValueError:
+        return path.stem
+    return '__'.join(relative.with_suffix('').parts)
+
+
+def sidecar_path(path):
+    """
+    Ruta del archivo Arrow asociado a un CSV de data/
+    """
+    return CACHE_DIR / (_cache_stem(path) + '.arrow')
+
+
+def aggregates_path(path):
+    """
+    Ruta del archivo JSON con los agregados persistentes de un CSV de data/
+    """
+    return CACHE_DIR / (_cache_stem(path) + '.aggregates.json')
+
+
+def _read_source(path):
+    """
+    Leer el archivo fuente como DataFrame
+    """
+    return pd.read_csv(path)
+
+
+def downcast_dtypes(frame):
+    """
+    Reducir cada columna al tipo más estrecho que conserva sus valores:
+    enteros (y decimales sin parte fraccionaria) al menor entero con signo,
+    decimales a float32 si no pierden precisión y texto a categórico
+    """
+    columns = {}
+    for column in frame.columns:
+        values = frame[column]
+        if pd.api.types.is_bool_dtype(values) or isinstance(values.dtype, pd.CategoricalDtype):
+            continue
+        if pd.api.types.is_integer_dtype(values):
+            columns[column] = pd.to_numeric(values, downcast='integer')
+        elif pd.api.types.is_float_dtype(values):
+            if values.notna().all() and (values % 1 == 0).all():
+                columns[column] = pd.to_numeric(values.astype(np.int64), downcast='integer')
+                continue
+            narrow = values.astype(np.float32)
+            if np.array_equal(narrow.to_numpy(dtype=np.float64), values.to_numpy(dtype=np.float64),
+                              equal_nan=True):
+                columns[column] = narrow
+        elif values.dtype == object or pd.api.types.is_string_dtype(values):
+            columns[column] = values.astype('category')
+    return frame.assign(**columns) if columns else frame
+
+
+def memory_report(frame):
+    """
+    Uso de memoria por columna: tipo actual, bytes ocupados y bytes que
+    ocuparía con los tipos por defecto de pandas (int64, float64, object)
+    """
+    rows = []
+    for column in frame.columns:
+        values = frame[column]
+        used = values.memory_usage(index=False, deep=True)
+        if isinstance(values.dtype, pd.CategoricalDtype) or values.dtype == object \
+                or pd.api.types.is_string_dtype(values):
+            default = values.astype(object).memory_usage(index=False, deep=True)
+        elif pd.api.types.is_bool_dtype(values):
+            default = len(values)
+        else:
+            default = 8 * len(values)
+        rows.append((column, str(values.dtype), used, default))
+    report = pd.DataFrame(rows, columns=['column', 'dtype', 'bytes', 'default_bytes'])
+    report = report.set_index('column')
+    report['ratio'] = report['default_bytes'] / report['bytes'].where(report['bytes'] > 0)
+    return report
+
+
+def _prepare_dtypes(frame):
+    """
+    Asignar tipos columnares a un DataFrame recién leído del CSV: las
+    columnas de texto pasan a categóricas (diccionario en Arrow), usando las
+    categorías del libro de códigos cuando la columna está registrada, y las
+    numéricas al tipo más estrecho posible
+    """
+    return downcast_dtypes(load_codebook().encode(frame))
+
+
+def convert_to_arrow(path, digest=None):
+    """
+    Convertir un CSV a un archivo Arrow IPC sin compresión junto a data/.
+
+    El archivo guarda en sus metadatos el hash del CSV de origen para poder
+    detectar cuándo queda desactualizado. Devuelve la ruta escrita.
+    """
+    if pa is None:
+        raise ImportError("Se requiere pyarrow para generar la caché columnar")
+
+    path = resolve_path(path)
+    if digest is None:
+        digest = file_digest(path)
+
+    frame = _prepare_dtypes(_read_source(path))
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[_DIGEST_KEY] = digest.encode()
+    metadata[_CODEBOOK_KEY] = load_codebook().version.encode()
+    metadata[_FORMAT_KEY] = _FORMAT_VERSION
+    table = table.replace_schema_metadata(metadata)
+
+    target = sidecar_path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    # Escritura atómica: varios procesos pueden convertir a la vez
+    tmp = target.with_name(f'{target.name}.{os.getpid()}.tmp')
+    with pa.OSFile(str(tmp), 'wb') as sink:
+        with pa_ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp, target)
+    return target
+
+
+def _open_sidecar(path, digest):
+    """
+    Abrir el archivo Arrow de un CSV mediante memory-mapping, generándolo si
+    no existe o no corresponde al contenido actual. Devuelve None si no se
+    puede usar la caché columnar.
+    """
+    if pa is None:
+        return None
+
+    target = sidecar_path(path)
+    try:
+        if target.exists():
+            table = pa_ipc.open_file(pa.memory_map(str(target), 'r')).read_all()
+            metadata = table.schema.metadata or {}
+            if metadata.get(_DIGEST_KEY) == digest.encode() and \
+                    metadata.get(_CODEBOOK_KEY) == load_codebook().version.encode() and \
+                    metadata.get(_FORMAT_KEY) == _FORMAT_VERSION:
+                return table
+        convert_to_arrow(path, digest)
+        return pa_ipc.open_file(pa.memory_map(str(target), 'r')).read_all()
+    except (OSError, pa.ArrowException):
+        # Directorio de solo lectura o archivo corrupto: se usa el CSV
+        return None
+
+
+def _get_entry(name):
+    """
+    Obtener la entrada de caché vigente para un dataset, recargándolo solo
+    si su contenido cambió
+    """
+    path = resolve_path(name)
+    stat = path.stat()
+    key = str(path)
+    codebook = load_codebook().version
+
+    # Camino rápido: mismo mtime y tamaño, no hace falta leer el archivo
+    with _lock:
+        entry = _cache.get(key)
+        if entry is not None and entry['mtime_ns'] == stat.st_mtime_ns \
+                and entry['size'] == stat.st_size and entry['codebook'] == codebook:
+            return entry
+
+    # El mtime cambió: solo se vuelve a parsear si cambió el contenido
+    digest = file_digest(path)
+    with _lock:
+        entry = _cache.get(key)
+        if entry is not None and entry['digest'] == digest and entry['codebook'] == codebook:
+            entry['mtime_ns'] = stat.st_mtime_ns
+            entry['size'] = stat.st_size
+            return entry
+
+    entry = {
+        'path': path,
+        'digest': digest,
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'codebook': codebook,
+        'table': _open_sidecar(path, digest),
+        'frames': {},
+    }
+    with _lock:
+        _cache[key] = entry
+    return entry
+
+
+def _entry_frame(entry, columns):
+    """
+    Materializar (una sola vez por proceso) el DataFrame de las columnas
+    pedidas a partir de la entrada de caché
+    """
+    key = None if columns is None else tuple(columns)
+    with _lock:
+        frame = entry['frames'].get(key)
+    if frame is not None:
+        return frame
+
+    if entry['table'] is not None:
+        table = entry['table'] if key is None else entry['table'].select(list(key))
+        # split_blocks evita consolidar columnas y permite que las columnas
+        # numéricas apunten directamente al archivo mapeado en memoria
+        frame = table.to_pandas(split_blocks=True)
+    else:
+        with _lock:
+            full = entry['frames'].get(None)
+        if full is None:
+            full = _prepare_dtypes(_read_source(entry['path']))
+            full.attrs['source'] = entry['path'].name
+            full.attrs['version'] = entry['digest']
+            with _lock:
+                full = entry['frames'].setdefault(None, full)
+        frame = full if key is None else full[list(key)]
+
+    frame.attrs['source'] = entry['path'].name
+    frame.attrs['version'] = entry['digest']
+    with _lock:
+        frame = entry['frames'].setdefault(key, frame)
+    return frame
+
+
+def load_survey(name='encuesta_recreacion.csv', columns=None):
+    """
+    Cargar un dataset de la encuesta desde data/ usando la caché compartida.
+
+    La caché se indexa por el hash del contenido y el mtime del archivo, de
+    modo que solo se vuelve a leer cuando los datos cambian realmente. Si
+    pyarrow está instalado, el CSV se convierte una vez a un archivo Arrow en
+    data/.cache/ que luego se abre con memory-mapping, leyendo solo las
+    columnas indicadas en `columns`.
+
+    Se devuelve una copia superficial del DataFrame compartido; con
+    copy-on-write cualquier modificación (agregar columnas, asignar con
+    .loc, inplace=True) copia antes los datos afectados, así que no alcanza
+    a las demás sesiones.
+    """
+    return _entry_frame(_get_entry(name), columns).copy(deep=False)
+
+
+def load_numeric_survey(columns=None):
+    """
+    Cargar el dataset numérico de la encuesta, derivado al vuelo del dataset
+    de texto mediante el libro de códigos (data/codebook.json)
+    """
+    entry = _get_entry(SURVEY_FILE)
+    key = ('numeric', None if columns is None else tuple(columns))
+    with _lock:
+        frame = entry['frames'].get(key)
+    if frame is None:
+        codebook = load_codebook()
+        frame = downcast_dtypes(codebook.numeric(_entry_frame(entry, list(codebook.numeric_columns))))
+        if columns is not None:
+            frame = frame[list(columns)]
+        frame.attrs['source'] = entry['path'].name
+        frame.attrs['version'] = entry['digest']
+        with _lock:
+            frame = entry['frames'].setdefault(key, frame)
+    return frame.copy(deep=False)
+
+
+def load_survey_index(name=SURVEY_FILE):
+    """
+    Obtener el índice de bitmaps de las columnas categóricas de un dataset.
+
+    Se construye una vez por versión del archivo y sus posiciones de fila
+    coinciden con las de load_survey() y load_numeric_survey().
+    """
+    entry = _get_entry(name)
+    with _lock:
+        index = entry.get('index')
+    if index is None:
+        index = BitmapIndex.from_frame(_entry_frame(entry, None))
+        with _lock:
+            index = entry.setdefault('index', index)
+    return index
+
+
+def _aggregate_frame(frame):
+    """
+    Preparar un bloque de la encuesta de texto para acumular sus agregados:
+    columnas del dataset numérico más las columnas categóricas del libro
+    """
+    codebook = load_codebook()
+    categorical = [c for c in codebook.columns if c in frame.columns]
+    numeric = codebook.numeric(frame)
+    satisfaccion = numeric['Satisfaccion']
+    numeric['Satisfaccion_Alta'] = (satisfaccion >= SATISFACCION_ALTA).astype(float).where(
+        satisfaccion.notna()
+    )
+    return pd.concat([numeric, frame[categorical]], axis=1)
+
+
+def _build_aggregates(frame):
+    """
+    Calcular desde cero los agregados de la encuesta
+    """
+    data = _aggregate_frame(frame)
+    categorical = [c for c in load_codebook().columns if c in data.columns]
+    return SurveyAggregates.from_frame(data, AGGREGATE_COLUMNS, AGGREGATE_GROUPS, categorical)
+
+
+def _read_aggregates(path, stat):
+    """
+    Leer los agregados persistentes si corresponden al estado actual del
+    archivo (tamaño, mtime y libro de códigos), al formato y a la
+    configuración actual de columnas y agrupaciones; si no, devolver None
+    """
+    try:
+        stored = json.loads(aggregates_path(path).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+    if stored.get('size') != stat.st_size or stored.get('mtime_ns') != stat.st_mtime_ns \
+            or stored.get('codebook') != load_codebook().version \
+            or stored['aggregates'].get('format') != FORMAT_VERSION:
+        return None
+    aggregates = SurveyAggregates.from_dict(stored['aggregates'])
+    if aggregates.columns != AGGREGATE_COLUMNS or aggregates.group_by != AGGREGATE_GROUPS:
+        return None
+    return aggregates
+
+
+def _write_aggregates(path, aggregates, stat):
+    """
+    Guardar los agregados junto con el estado del archivo que resumen
+    """
+    target = aggregates_path(path)
+    payload = {
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'codebook': load_codebook().version,
+        'aggregates': aggregates.to_dict(),
+    }
+    try:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f'{target.name}.{os.getpid()}.tmp')
+        tmp.write_text(json.dumps(payload), encoding='utf-8')
+        os.replace(tmp, target)
+    except OSError:
+        # Directorio de solo lectura: los agregados quedan solo en memoria
+        pass
+
+
+def load_survey_aggregates(name=SURVEY_FILE):
+    """
+    Obtener los agregados combinables de la encuesta (momentos, productos
+    cruzados, momentos por grupo y frecuencias).
+
+    Se guardan en data/.cache/ y se mantienen al día con append_responses()
+    sin recorrer de nuevo el archivo; solo se recalculan completos si el
+    CSV se modificó por otra vía.
+    """
+    path = resolve_path(name)
+    stat = path.stat()
+    key = str(path)
+    state = (stat.st_size, stat.st_mtime_ns, load_codebook().version)
+
+    with _lock:
+        cached = _aggregates.get(key)
+        if cached is not None and cached[0] == state:
+            return cached[1]
+
+    aggregates = _read_aggregates(path, stat)
+    if aggregates is None:
+        aggregates = _build_aggregates(_entry_frame(_get_entry(name), None))
+        _write_aggregates(path, aggregates, stat)
+    with _lock:
+        _aggregates[key] = (state, aggregates)
+    return aggregates
+
+
+def append_responses(rows, name=SURVEY_FILE):
+    """
+    Agregar nuevas respuestas (filas con su 'Participante') al final del CSV
+    de la encuesta y actualizar los agregados persistentes procesando solo
+    las filas nuevas. Devuelve los agregados actualizados.
+
+    Las etiquetas se validan contra el libro de códigos antes de escribir.
+    """
+    new = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(list(rows))
+    path = resolve_path(name)
+
+    with _append_lock:
+        # Sincronizar primero: los agregados deben resumir el archivo actual
+        aggregates = load_survey_aggregates(name)
+
+        header = list(pd.read_csv(path, nrows=0).columns)
+        missing = [c for c in header if c not in new.columns]
+        if missing:
+            raise ValueError(f"Faltan columnas en las respuestas nuevas: {missing}")
+        if 'Participante' in header and new['Participante'].isna().any():
+            raise ValueError("Cada respuesta nueva debe indicar su 'Participante'")
+        new = new[header].reset_index(drop=True)
+        encoded = load_codebook().encode(new)
+
+        with open(path, 'rb+') as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    f.write(b'\n')
+        new.to_csv(path, mode='a', header=False, index=False)
+
+        aggregates = aggregates.merge(aggregates.chunk(_aggregate_frame(encoded)))
+        stat = path.stat()
+        _write_aggregates(path, aggregates, stat)
+        with _lock:
+            _aggregates[str(path)] = ((stat.st_size, stat.st_mtime_ns, load_codebook().version),
+                                      aggregates)
+    return aggregates
+
+
+def dataset_version(name='encuesta_recreacion.csv'):
+    """
+    Devolver el hash del contenido con el que se cargó el dataset
+    """
+    return _get_entry(name)['digest']
+
+
+def clear_cache():
+    """
+    Vaciar la caché de datasets del proceso
+    """
+    with _lock:
+        _cache.clear()
+        _aggregates.clear()
@@ -0,0 +1,119 @@
+import hashlib
+import json
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Libro de códigos compartido por todas las páginas
+CODEBOOK_PATH = Path(__file__).resolve().parent.parent / 'data' / 'codebook.json'
+
+_cache = {}
+_lock = threading.Lock()
+
+
+class Codebook:
+    """
+    Libro de códigos de la encuesta: categorías (y su orden) de cada columna
+    de texto, valores numéricos asociados y columnas del dataset numérico
+    """
+
+    def __init__(self, spec, version=None):
+        self.spec = spec
+        self.version = version
+        self.dtypes = {
+            column: pd.CategoricalDtype(entry['categories'], ordered=entry.get('ordered', False))
+            for column, entry in spec['categorical'].items()
+        }
+        self.values = {
+            column: np.asarray(entry['values'])
+            for column, entry in spec['categorical'].items() if 'values' in entry
+        }
+        self.numeric_columns = dict(spec.get('numeric_dataset', {}))
+
+    @classmethod
+    def load(cls, path=CODEBOOK_PATH):
+        """
+        Leer un libro de códigos desde JSON
+        """
+        raw = Path(path).read_bytes()
+        return cls(json.loads(raw), version=hashlib.sha256(raw).hexdigest())
+
+    def save(self, path=CODEBOOK_PATH):
+        """
+        Guardar el libro de códigos en JSON
+        """
+        Path(path).write_text(json.dumps(self.spec, ensure_ascii=False, indent=2) + '\n',
+                              encoding='utf-8')
+
+    @property
+    def columns(self):
+        return list(self.dtypes)
+
+    def encode(self, frame):
+        """
+        Convertir todas las columnas de texto del libro a categóricas con las
+        categorías del libro. Las etiquetas desconocidas producen un error.
+        """
+        encoded = {}
+        for column, dtype in self.dtypes.items():
+            if column not in frame.columns:
+                continue
+            values = frame[column]
+            encoded[column] = values.astype(dtype)
+            unknown = values.notna() & encoded[column].isna()
+            if unknown.any():
+                labels = sorted(values[unknown].astype(str).unique())
+                raise ValueError(
+                    f"Etiquetas no registradas en el libro de códigos para '{column}': {labels}"
+                )
+        return frame.assign(**encoded) if encoded else frame
+
+    def codes(self, frame, column):
+        """
+        Códigos enteros (int8, -1 para faltantes) de una columna codificada
+        """
+        series = frame[column]
+        if not isinstance(series.dtype, pd.CategoricalDtype) or series.dtype != self.dtypes[column]:
+            series = series.astype(self.dtypes[column])
+        return series.cat.codes.to_numpy()
+
+    def numeric_values(self, frame, column):
+        """
+        Valores numéricos de una columna codificada (NaN para faltantes)
+        """
+        codes = self.codes(frame, column)
+        table = self.values[column]
+        if (codes < 0).any():
+            table = np.append(table.astype(float), np.nan)
+        return table[codes]
+
+    def numeric(self, frame):
+        """
+        Derivar el dataset numérico a partir del dataset de texto
+        """
+        columns = {}
+        for source, target in self.numeric_columns.items():
+            if source in self.values:
+                columns[target] = self.numeric_values(frame, source)
+            else:
+                columns[target] = frame[source].to_numpy()
+        return pd.DataFrame(columns, index=frame.index)
+
+
+def load_codebook(path=CODEBOOK_PATH):
+    """
+    Obtener el libro de códigos, releyéndolo solo si el archivo cambió
+    """
+    path = Path(path)
+    stat = path.stat()
+    key = (str(path), stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        codebook = _cache.get(str(path))
+        if codebook is not None and codebook[0] == key:
+            return codebook[1]
+    codebook = Codebook.load(path)
+    with _lock:
+        _cache[str(path)] = (key, codebook)
+    return codebook
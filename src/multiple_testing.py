@@ -0,0 +1,60 @@
+import numpy as np
+
+from src.results import ResultTable
+
+CORRECTIONS = {
+    'bonferroni': 'Bonferroni',
+    'holm': 'Holm',
+    'fdr_bh': 'Benjamini-Hochberg',
+    'fdr_by': 'Benjamini-Yekutieli',
+}
+
+
+def adjust_pvalues(p_values, method='holm'):
+    """
+    Ajustar un arreglo de valores p por comparaciones múltiples con un solo
+    ordenamiento. Los NaN se ignoran (no cuentan en el tamaño de la familia)
+    y el resultado conserva la forma y el orden de la entrada.
+    """
+    if method not in CORRECTIONS:
+        raise ValueError(f"Corrección desconocida: '{method}'")
+    p = np.asarray(p_values, dtype=float)
+    flat = p.ravel()
+    valid = np.flatnonzero(~np.isnan(flat))
+    m = len(valid)
+    adjusted = np.full(flat.shape, np.nan)
+    if m == 0:
+        return adjusted.reshape(p.shape)
+
+    if method == 'bonferroni':
+        adjusted[valid] = np.minimum(flat[valid] * m, 1.0)
+        return adjusted.reshape(p.shape)
+
+    order = valid[np.argsort(flat[valid], kind='stable')]
+    ranked = flat[order]
+    i = np.arange(1, m + 1)
+    if method == 'holm':
+        # Paso descendente: máximo acumulado de (m − i + 1)·p₍ᵢ₎
+        values = np.maximum.accumulate((m - i + 1) * ranked)
+    else:
+        # Paso ascendente: mínimo acumulado desde el final de (m / i)·p₍ᵢ₎
+        factor = m / i
+        if method == 'fdr_by':
+            factor = factor * np.sum(1.0 / i)
+        values = np.minimum.accumulate((factor * ranked)[::-1])[::-1]
+    adjusted[order] = np.minimum(values, 1.0)
+    return adjusted.reshape(p.shape)
+
+
+def correct_table(table, method='holm', alpha=0.05, column='p_value'):
+    """
+    Agregar a una tabla de resultados las columnas p_adjusted y significant
+    (p ajustado < alpha). En una ResultTable la significancia queda en el
+    bit SIGNIFICANT de flags.
+    """
+    if isinstance(table, ResultTable):
+        return table.with_columns(alpha=alpha, p_adjusted=adjust_pvalues(table[column], method))
+    table = table.copy()
+    table['p_adjusted'] = adjust_pvalues(table[column].to_numpy(), method)
+    table['significant'] = table['p_adjusted'] < alpha
+    return table
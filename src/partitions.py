@@ -0,0 +1,179 @@
+import json
+import os
+import threading
+from functools import reduce
+
+import pandas as pd
+
+from src.aggregates import FORMAT_VERSION, SurveyAggregates
+from src.data_loader import (AGGREGATE_COLUMNS, AGGREGATE_GROUPS, _build_aggregates,
+                             load_survey, resolve_path)
+from src.encoding import load_codebook
+
+# Nombre del manifiesto dentro del directorio de particiones
+MANIFEST_FILE = 'manifest.json'
+
+_lock = threading.Lock()
+
+
+class PartitionedDataset:
+    """
+    Dataset de la encuesta repartido en un CSV por ola (o mes) dentro de un
+    directorio de data/, por ejemplo data/encuesta_recreacion/2024-01.csv.
+
+    El manifiesto (manifest.json) guarda por partición su tamaño, mtime,
+    número de filas y los agregados combinables, de modo que los resúmenes
+    entre olas se obtienen sin leer los CSV y las consultas filtradas por
+    ola solo abren los archivos necesarios.
+    """
+
+    def __init__(self, name, key='Ola'):
+        self.directory = resolve_path(name)
+        self.key = key
+        self.manifest = self._read_manifest()
+        self.refresh()
+
+    @property
+    def manifest_path(self):
+        return self.directory / MANIFEST_FILE
+
+    def _read_manifest(self):
+        try:
+            manifest = json.loads(self.manifest_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return {'key': self.key, 'partitions': {}}
+        self.key = manifest.get('key', self.key)
+        return manifest
+
+    def _write_manifest(self):
+        tmp = self.manifest_path.with_name(f'{MANIFEST_FILE}.{os.getpid()}.tmp')
+        try:
+            tmp.write_text(json.dumps(self.manifest, ensure_ascii=False), encoding='utf-8')
+            os.replace(tmp, self.manifest_path)
+        except OSError:
+            # Directorio de solo lectura: el manifiesto queda solo en memoria
+            pass
+
+    def _summarize(self, path):
+        """
+        Calcular la entrada del manifiesto de un archivo de partición
+        """
+        stat = path.stat()
+        aggregates = _build_aggregates(load_survey(path))
+        return {
+            'file': path.name,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'codebook': load_codebook().version,
+            'rows': aggregates.rows,
+            'aggregates': aggregates.to_dict(),
+        }
+
+    def _is_current(self, entry, path):
+        stat = path.stat()
+        stored = entry.get('aggregates', {})
+        return entry.get('size') == stat.st_size and entry.get('mtime_ns') == stat.st_mtime_ns \
+            and entry.get('codebook') == load_codebook().version \
+            and stored.get('format') == FORMAT_VERSION \
+            and stored.get('moments', {}).get('columns') == AGGREGATE_COLUMNS \
+            and list(stored.get('groups', {})) == AGGREGATE_GROUPS
+
+    def refresh(self):
+        """
+        Sincronizar el manifiesto con los archivos del directorio: solo se
+        leen las particiones nuevas o modificadas
+        """
+        files = {path.stem: path for path in sorted(self.directory.glob('*.csv'))}
+        with _lock:
+            partitions = self.manifest.setdefault('partitions', {})
+            changed = False
+            for value in list(partitions):
+                if value not in files:
+                    del partitions[value]
+                    changed = True
+            for value, path in files.items():
+                entry = partitions.get(value)
+                if entry is None or not self._is_current(entry, path):
+                    partitions[value] = self._summarize(path)
+                    changed = True
+            self.manifest['key'] = self.key
+            if changed:
+                self._write_manifest()
+        return self
+
+    @property
+    def partitions(self):
+        return sorted(self.manifest['partitions'])
+
+    def prune(self, values=None, start=None, end=None):
+        """
+        Particiones que cumplen el filtro sobre la clave: una lista de
+        valores y/o un rango [start, end] (comparación de texto, p. ej.
+        '2024-01' ≤ ola ≤ '2024-06')
+        """
+        selected = []
+        for value in self.partitions:
+            if values is not None and value not in values:
+                continue
+            if start is not None and value < start:
+                continue
+            if end is not None and value > end:
+                continue
+            selected.append(value)
+        return selected
+
+    def stats(self):
+        """
+        Tabla con el número de filas y el tamaño de cada partición
+        """
+        partitions = self.manifest['partitions']
+        return pd.DataFrame(
+            [(v, partitions[v]['rows'], partitions[v]['size']) for v in self.partitions],
+            columns=[self.key, 'rows', 'size']
+        ).set_index(self.key)
+
+    def load(self, values=None, start=None, end=None, columns=None):
+        """
+        Cargar solo las particiones seleccionadas, con una columna adicional
+        con la clave de partición
+        """
+        selected = self.prune(values, start, end)
+        if not selected:
+            raise ValueError("Ninguna partición cumple el filtro")
+        frames = []
+        for value in selected:
+            frame = load_survey(self.directory / self.manifest['partitions'][value]['file'], columns)
+            frame[self.key] = value
+            frames.append(frame)
+        data = pd.concat(frames, ignore_index=True)
+        data[self.key] = pd.Categorical(data[self.key], categories=selected, ordered=True)
+        return data
+
+    def aggregates(self, values=None, start=None, end=None):
+        """
+        Agregados de las particiones seleccionadas, combinando los resúmenes
+        del manifiesto sin leer los archivos
+        """
+        selected = self.prune(values, start, end)
+        if not selected:
+            raise ValueError("Ninguna partición cumple el filtro")
+        return reduce(
+            SurveyAggregates.merge,
+            (SurveyAggregates.from_dict(self.manifest['partitions'][v]['aggregates'])
+             for v in selected)
+        )
+
+    def write_partition(self, value, frame):
+        """
+        Guardar (o reemplazar) la partición de una ola y registrarla en el
+        manifiesto
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f'{value}.csv'
+        frame = frame.drop(columns=[self.key], errors='ignore')
+        load_codebook().encode(frame)
+        frame.to_csv(path, index=False)
+        with _lock:
+            self.manifest['partitions'][str(value)] = self._summarize(path)
+            self._write_manifest()
+        return path
@@ -0,0 +1,203 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from src.correlation import correlation_matrix
+
+# Número máximo de columnas ordenadas que se conservan en memoria
+CACHE_SIZE = 128
+
+
+def _average_ranks(sorted_values):
+    """
+    Rangos promedio (empezando en 1) de valores ya ordenados, y el término
+    de empates Σ(t³ − t)
+    """
+    n = len(sorted_values)
+    if n == 0:
+        return np.empty(0), 0.0
+    start = np.flatnonzero(np.r_[True, sorted_values[1:] != sorted_values[:-1]])
+    counts = np.diff(np.r_[start, n])
+    ranks = np.repeat(start + (counts + 1) / 2, counts)
+    counts = counts.astype(float)
+    return ranks, float((counts ** 3 - counts).sum())
+
+
+class ColumnRanks:
+    """
+    Orden de una columna calculado una sola vez. Los rangos de cualquier
+    subconjunto de filas se obtienen recorriendo este orden (O(n), sin volver
+    a ordenar).
+    """
+
+    def __init__(self, values):
+        values = np.asarray(values, dtype=float)
+        self.size = len(values)
+        valid = np.flatnonzero(~np.isnan(values))
+        self.order = valid[np.argsort(values[valid], kind='stable')]
+        self.sorted_values = values[self.order]
+        ranks, self.tie_term = _average_ranks(self.sorted_values)
+        self.ranks = np.full(self.size, np.nan)
+        self.ranks[self.order] = ranks
+
+    @property
+    def n(self):
+        return len(self.order)
+
+    def subset(self, rows):
+        """
+        Rangos dentro de un subconjunto de filas (posiciones o máscara
+        booleana): devuelve las posiciones en orden ascendente de valor, sus
+        rangos y el término de empates
+        """
+        mask = np.zeros(self.size, dtype=bool)
+        mask[rows] = True
+        keep = mask[self.order]
+        ranks, tie_term = _average_ranks(self.sorted_values[keep])
+        return self.order[keep], ranks, tie_term
+
+
+class RankCache:
+    """
+    Caché de rangos por (versión del dataset, columna, huella de los
+    valores). La versión es el hash que el cargador guarda en
+    DataFrame.attrs['version']; los DataFrames sin versión no se guardan en
+    caché. La huella (un hash lineal de los valores, más barato que
+    ordenarlos) evita devolver rangos viejos cuando una columna se reemplaza
+    con assign() o df[col] = ... y conserva attrs e índice.
+    """
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, frame, column):
+        version = frame.attrs.get('version')
+        values = frame[column].to_numpy(dtype=float, na_value=np.nan)
+        if version is None:
+            return ColumnRanks(values)
+        # attrs se propaga a los subconjuntos y reordenamientos: el índice
+        # distingue el DataFrame original de sus derivados
+        fingerprint = hashlib.blake2b(np.ascontiguousarray(values).tobytes(), digest_size=16).digest()
+        key = (version, column, fingerprint)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[0] is frame.index or entry[0].equals(frame.index)):
+                self._entries.move_to_end(key)
+                return entry[1]
+        ranks = ColumnRanks(values)
+        with self._lock:
+            self._entries[key] = (frame.index, ranks)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return ranks
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Caché compartida por todas las sesiones del proceso
+rank_cache = RankCache()
+
+
+def rank_frame(frame, columns, cache=rank_cache):
+    """
+    DataFrame de rangos promedio de las columnas indicadas
+    """
+    return pd.DataFrame({c: cache.get(frame, c).ranks for c in columns}, index=frame.index)
+
+
+def spearman_matrix(frame, columns=None, cache=rank_cache):
+    """
+    Correlación de Spearman: Pearson sobre los rangos en caché
+    """
+    if columns is None:
+        columns = frame.select_dtypes(include=[np.number]).columns
+    columns = list(columns)
+    if frame[columns].isna().to_numpy().any():
+        # Con faltantes los rangos dependen de cada par de columnas
+        return frame[columns].corr(method='spearman')
+    return correlation_matrix(rank_frame(frame, columns, cache))
+
+
+def kendall_matrix(frame, columns=None, cache=rank_cache):
+    """
+    Tau-b de Kendall para cada par de columnas, calculada sobre los rangos
+    en caché
+    """
+    if columns is None:
+        columns = frame.select_dtypes(include=[np.number]).columns
+    columns = list(columns)
+    if frame[columns].isna().to_numpy().any():
+        return frame[columns].corr(method='kendall')
+    ranks = rank_frame(frame, columns, cache).to_numpy()
+    result = np.eye(len(columns))
+    for i, j in zip(*np.triu_indices(len(columns), k=1)):
+        result[i, j] = result[j, i] = stats.kendalltau(ranks[:, i], ranks[:, j]).statistic
+    return pd.DataFrame(result, index=columns, columns=columns)
+
+
+def mann_whitney(frame, column, first, second, cache=rank_cache):
+    """
+    Prueba U de Mann-Whitney (bilateral) entre dos conjuntos de filas del
+    DataFrame (posiciones o máscaras), con corrección por empates y por
+    continuidad como scipy.stats.mannwhitneyu
+    """
+    ranks = cache.get(frame, column)
+    labels = np.zeros(ranks.size, dtype=np.int8)
+    labels[first] = 1
+    labels[second] = 2
+    positions, subset_ranks, tie_term = ranks.subset(labels > 0)
+    labels = labels[positions]
+    n1, n2 = np.count_nonzero(labels == 1), np.count_nonzero(labels == 2)
+    if n1 == 0 or n2 == 0:
+        raise ValueError("Ambos grupos deben tener al menos una observación")
+
+    if (n1 <= 8 or n2 <= 8) and tie_term == 0:
+        # Muestras pequeñas sin empates: distribución exacta de scipy
+        values = frame[column].to_numpy(dtype=float, na_value=np.nan)
+        result = stats.mannwhitneyu(values[positions[labels == 1]], values[positions[labels == 2]],
+                                    alternative='two-sided')
+        return result.statistic, result.pvalue
+
+    u1 = subset_ranks[labels == 1].sum() - n1 * (n1 + 1) / 2
+    u = max(u1, n1 * n2 - u1)
+    n = n1 + n2
+    sigma = np.sqrt(n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1))))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = (u - n1 * n2 / 2 - 0.5) / sigma
+    return u1, min(1.0, 2 * stats.norm.sf(z))
+
+
+def kruskal_wallis(frame, column, group_column, rows=None, cache=rank_cache):
+    """
+    Prueba H de Kruskal-Wallis de `column` entre los grupos de
+    `group_column`, opcionalmente restringida a un subconjunto de filas
+    """
+    ranks = cache.get(frame, column)
+    codes, _ = pd.factorize(frame[group_column], sort=True)
+    mask = codes >= 0
+    if rows is not None:
+        selected = np.zeros(ranks.size, dtype=bool)
+        selected[rows] = True
+        mask &= selected
+    positions, subset_ranks, tie_term = ranks.subset(mask)
+    groups = codes[positions]
+    n_i = np.bincount(groups)
+    r_i = np.bincount(groups, weights=subset_ranks)
+    present = n_i > 0
+    if present.sum() < 2:
+        raise ValueError("Se necesitan al menos dos grupos con observaciones")
+    n_i, r_i = n_i[present], r_i[present]
+    n = n_i.sum()
+    h = 12 / (n * (n + 1)) * (r_i ** 2 / n_i).sum() - 3 * (n + 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        h /= 1 - tie_term / (n ** 3 - n)
+    return h, stats.chi2.sf(h, len(n_i) - 1)
@@ -0,0 +1,447 @@
+import itertools
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+from scipy import stats
+
+from src.critical_values import norm_ppf
+
+# Permutaciones por lote: cada lote es una matriz de índices de
+# BATCH_SIZE × n evaluada de forma vectorizada (con n grande, menos filas
+# para no superar BATCH_ELEMENTS índices por lote)
+BATCH_SIZE = 2000
+BATCH_ELEMENTS = 1 << 22
+MAX_PERMUTATIONS = 100_000
+MIN_PERMUTATIONS = 2000
+# Error de Monte Carlo del valor p con el que se detiene el muestreo
+TOLERANCE = 0.002
+# Se enumeran todas las permutaciones distintas si no superan este número
+# y si el total de índices enumerados (asignaciones × n) no supera
+# EXACT_ELEMENTS; la enumeración también se recorre por lotes
+EXACT_LIMIT = 100_000
+EXACT_ELEMENTS = 20_000_000
+
+STATISTICS = ('mean', 'median', 'proportion', 'correlation')
+
+# Datos de la prueba en cada proceso del pool (se envían una sola vez)
+_payload = None
+
+
+def _init_worker(payload):
+    global _payload
+    _payload = payload
+
+
+def _default_workers():
+    return min(4, os.cpu_count() or 1)
+
+
+def _evaluate(payload, perms):
+    """
+    Estadístico para cada fila de una matriz de permutaciones
+    """
+    statistic = payload['statistic']
+    if statistic == 'correlation':
+        # x ya está estandarizado: r = Σ zx · zy[perm] / n
+        return payload['zy'][perms] @ payload['zx'] / len(payload['zx'])
+    values, n1 = payload['values'], payload['n1']
+    first, second = values[perms[:, :n1]], values[perms[:, n1:]]
+    if statistic == 'median':
+        return np.median(first, axis=1) - np.median(second, axis=1)
+    return first.mean(axis=1) - second.mean(axis=1)
+
+
+def _count_extreme(payload, perms):
+    # Tolerancia relativa para que los empates numéricos cuenten como extremos
+    observed = abs(payload['observed'])
+    if np.isnan(observed):
+        # Estadístico indefinido: el valor p también lo es
+        return np.nan
+    simulated = np.abs(_evaluate(payload, perms))
+    return int(np.count_nonzero(simulated >= observed * (1 - 1e-12) - 1e-14))
+
+
+def _random_batch(seed, size):
+    """
+    Lote de permutaciones aleatorias con su propio generador; el resultado
+    depende solo de la semilla del lote, no del proceso que lo ejecuta
+    """
+    payload = _payload
+    rng = np.random.default_rng(seed)
+    perms = rng.permuted(np.tile(np.arange(payload['n'], dtype=np.int32), (size, 1)), axis=1)
+    return _count_extreme(payload, perms), size
+
+
+def _exact_batches(payload):
+    """
+    Todas las asignaciones distintas, en lotes del mismo tamaño que los de
+    Monte Carlo: combinaciones del primer grupo para dos muestras,
+    permutaciones de y para la correlación
+    """
+    n = payload['n']
+    if payload['statistic'] == 'correlation':
+        assignments = itertools.permutations(range(n))
+    else:
+        assignments = itertools.combinations(range(n), payload['n1'])
+    rows = max(1, min(BATCH_SIZE, BATCH_ELEMENTS // n))
+    while True:
+        batch = np.array(list(itertools.islice(assignments, rows)), dtype=np.int32)
+        if len(batch) == 0:
+            return
+        if payload['statistic'] == 'correlation':
+            yield batch.reshape(-1, n)
+            continue
+        mask = np.zeros((len(batch), n), dtype=bool)
+        np.put_along_axis(mask, batch, True, axis=1)
+        # Primero los índices del grupo 1 y luego los del grupo 2
+        yield np.argsort(~mask, axis=1, kind='stable').astype(np.int32)
+
+
+def _distinct(payload):
+    n = payload['n']
+    if payload['statistic'] == 'correlation':
+        return math.factorial(n)
+    return math.comb(n, payload['n1'])
+
+
+def _payload_for(x, y, statistic):
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if statistic not in STATISTICS:
+        raise ValueError(f"Estadístico desconocido: '{statistic}'")
+    if statistic == 'correlation':
+        keep = ~(np.isnan(x) | np.isnan(y))
+        x, y = x[keep], y[keep]
+        if len(x) < 3:
+            raise ValueError("Se necesitan al menos tres pares completos")
+        if x.std() == 0 or y.std() == 0:
+            raise ValueError("La correlación no está definida: una de las variables tiene varianza cero")
+        zx = (x - x.mean()) / x.std()
+        zy = (y - y.mean()) / y.std()
+        return {'statistic': statistic, 'n': len(x), 'zx': zx, 'zy': zy,
+                'observed': float(zx @ zy / len(x))}
+
+    x, y = x[~np.isnan(x)], y[~np.isnan(y)]
+    if len(x) == 0 or len(y) == 0:
+        raise ValueError("Ambas muestras deben tener al menos una observación")
+    values = np.concatenate([x, y])
+    if statistic == 'proportion' and not np.isin(values, (0, 1)).all():
+        raise ValueError("La diferencia de proporciones requiere valores 0/1")
+    payload = {'statistic': statistic, 'n': len(values), 'n1': len(x), 'values': values}
+    payload['observed'] = float(_evaluate(payload, np.arange(len(values))[None, :])[0])
+    return payload
+
+
+def permutation_test(x, y, statistic='mean', max_permutations=MAX_PERMUTATIONS,
+                     tolerance=TOLERANCE, seed=0, workers=None, exact=None):
+    """
+    Prueba de permutación bilateral (cuenta las asignaciones con
+    |T*| ≥ |T observado|).
+
+    Con statistic='mean', 'median' o 'proportion' compara dos muestras
+    independientes x e y (diferencia de medias, medianas o proporciones);
+    con 'correlation' prueba la correlación de Pearson entre x e y
+    pareados.
+
+    Si el número de asignaciones distintas no supera EXACT_LIMIT ni su
+    tamaño total EXACT_ELEMENTS (o exact=True) el valor p es exacto y las
+    asignaciones se enumeran por lotes. Si no, las permutaciones se generan
+    en lotes de a lo sumo BATCH_SIZE filas repartidos en `workers` procesos,
+    cada lote con su propia semilla derivada de `seed` (el resultado no
+    depende del número de procesos), y el muestreo se detiene cuando el
+    error de Monte Carlo del valor p baja de `tolerance`.
+    """
+    payload = _payload_for(x, y, statistic)
+    if exact is None:
+        distinct = _distinct(payload)
+        exact = distinct <= EXACT_LIMIT and distinct * payload['n'] <= EXACT_ELEMENTS
+    if exact:
+        extreme = total = 0
+        for perms in _exact_batches(payload):
+            extreme += _count_extreme(payload, perms)
+            total += len(perms)
+        return {
+            'test': f'Permutación ({statistic})',
+            'statistic': payload['observed'],
+            'p_value': extreme / total,
+            'permutations': total,
+            'exact': True,
+            'mc_error': 0.0,
+        }
+
+    size = max(1, min(BATCH_SIZE, BATCH_ELEMENTS // payload['n']))
+    n_batches = math.ceil(max_permutations / size)
+    seeds = np.random.SeedSequence(seed).spawn(n_batches)
+    sizes = [min(size, max_permutations - i * size) for i in range(n_batches)]
+    workers = workers or _default_workers()
+    extreme = done = 0
+
+    def accumulate(results):
+        nonlocal extreme, done
+        for count, size in results:
+            extreme += count
+            done += size
+            p = (extreme + 1) / (done + 1)
+            if done >= MIN_PERMUTATIONS and np.sqrt(p * (1 - p) / done) < tolerance:
+                return True
+        return False
+
+    if workers == 1:
+        _init_worker(payload)
+        for seed_i, size in zip(seeds, sizes):
+            if accumulate([_random_batch(seed_i, size)]):
+                break
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(payload,)) as pool:
+            # Rondas de un lote por proceso; los resultados se recorren en
+            # el orden de los lotes para que el punto de parada sea
+            # reproducible
+            for start in range(0, n_batches, workers):
+                stop = slice(start, start + workers)
+                if accumulate(pool.map(_random_batch, seeds[stop], sizes[stop])):
+                    break
+
+    p_value = (extreme + 1) / (done + 1)
+    return {
+        'test': f'Permutación ({statistic})',
+        'statistic': payload['observed'],
+        'p_value': p_value,
+        'permutations': done,
+        'exact': False,
+        'mc_error': float(np.sqrt(p_value * (1 - p_value) / done)),
+    }
+
+
+# Elementos por lote de remuestreo (filas × n × columnas) para acotar la
+# memoria de cada matriz de índices
+CHUNK_ELEMENTS = 1 << 22
+N_RESAMPLES = 9999
+
+# Datos del bootstrap en cada proceso (vista sobre la memoria compartida)
+_shared = None
+
+
+def _mean(sample):
+    return sample.mean(axis=1)
+
+
+def _median(sample):
+    return np.median(sample, axis=1)
+
+
+def _ratio(sample):
+    return sample[..., 0].sum(axis=1) / sample[..., 1].sum(axis=1)
+
+
+def _slope(sample):
+    x, y = sample[..., 0], sample[..., 1]
+    xc = x - x.mean(axis=1, keepdims=True)
+    return (xc * (y - y.mean(axis=1, keepdims=True))).sum(axis=1) / (xc ** 2).sum(axis=1)
+
+
+def _intercept(sample):
+    return sample[..., 1].mean(axis=1) - _slope(sample) * sample[..., 0].mean(axis=1)
+
+
+# Estadísticos incorporados: los de una columna reciben una matriz
+# (lotes × n); los de dos columnas, (lotes × n × 2) con x e y
+BOOTSTRAP_STATISTICS = {
+    'mean': (_mean, 1),
+    'median': (_median, 1),
+    'ratio': (_ratio, 2),
+    'slope': (_slope, 2),
+    'intercept': (_intercept, 2),
+}
+
+
+def _attach(name, shape, dtype, statistic):
+    """
+    Inicializador de los procesos: vista de solo lectura sobre el bloque de
+    memoria compartida con los datos
+    """
+    global _shared
+    # El bloque lo crea y lo libera el proceso principal (los procesos del
+    # pool comparten su rastreador de recursos)
+    block = shared_memory.SharedMemory(name=name)
+    data = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+    data.flags.writeable = False
+    _shared = (block, data, statistic)
+
+
+def _use_local(data, statistic):
+    global _shared
+    _shared = (None, data, statistic)
+
+
+def _bootstrap_batch(seed, size):
+    """
+    Estadístico de `size` remuestras generadas con la semilla del lote
+    """
+    _, data, statistic = _shared
+    rng = np.random.default_rng(seed)
+    index = rng.integers(0, len(data), size=(size, len(data)))
+    # Remuestras degeneradas (p. ej. x constante) dan NaN y se ignoran
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.asarray(statistic(data[index]), dtype=float)
+
+
+def _jackknife_batch(start, stop):
+    """
+    Estadístico sin cada observación start..stop−1 (fila i: todos los
+    índices excepto start + i), sobre los datos del proceso
+    """
+    _, data, statistic = _shared
+    n = len(data)
+    drop = np.arange(start, stop)
+    index = np.arange(n - 1)[None, :]
+    index = index + (index >= drop[:, None])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.asarray(statistic(data[index]), dtype=float)
+
+
+def _mean_jackknife(data):
+    return (data.sum() - data) / (len(data) - 1)
+
+
+def _median_jackknife(data):
+    # Al quitar la observación de posición ordenada k, el j-ésimo valor
+    # ordenado restante es s[j] si j < k y s[j + 1] si no
+    n = len(data)
+    order = np.argsort(data, kind='stable')
+    s = data[order]
+    k = np.arange(n)
+
+    def remaining(j):
+        return np.where(j < k, s[j], s[j + 1])
+
+    half = (n - 1) // 2
+    values = remaining(half) if (n - 1) % 2 else (remaining(half - 1) + remaining(half)) / 2
+    theta = np.empty(n)
+    theta[order] = values
+    return theta
+
+
+def _ratio_jackknife(data):
+    x, y = data[:, 0], data[:, 1]
+    return (x.sum() - x) / (y.sum() - y)
+
+
+def _slope_jackknife(data):
+    # Sumas sin cada observación con x e y centrados (Σx = Σy = 0), lo que
+    # evita la cancelación de las sumas de cuadrados
+    x = data[:, 0] - data[:, 0].mean()
+    y = data[:, 1] - data[:, 1].mean()
+    m = len(data) - 1
+    sxy = (x * y).sum() - x * y
+    sxx = (x ** 2).sum() - x ** 2
+    return (m * sxy - x * y) / (m * sxx - x ** 2)
+
+
+def _intercept_jackknife(data):
+    x, y = data[:, 0], data[:, 1]
+    m = len(data) - 1
+    return (y.sum() - y) / m - _slope_jackknife(data) * (x.sum() - x) / m
+
+
+# Jackknife en forma cerrada (O(n) u O(n log n)) de los estadísticos
+# incorporados; las funciones propias recalculan el estadístico sin cada
+# observación, por bloques repartidos en el pool
+JACKKNIFE = {
+    _mean: _mean_jackknife,
+    _median: _median_jackknife,
+    _ratio: _ratio_jackknife,
+    _slope: _slope_jackknife,
+    _intercept: _intercept_jackknife,
+}
+
+
+def bootstrap(data, statistic='mean', n_resamples=N_RESAMPLES, confidence=0.95,
+              seed=0, workers=None):
+    """
+    Intervalos bootstrap (percentil, básico y BCa) de cualquier estadístico.
+
+    `data` es un arreglo de n observaciones (o de n × k para estadísticos de
+    varias columnas) y `statistic` el nombre de un estadístico incorporado
+    (BOOTSTRAP_STATISTICS) o una función de nivel de módulo que recibe un
+    lote de remuestras (lotes × n[, k]) y devuelve un valor por remuestra.
+
+    Las remuestras se generan como matrices de índices por lotes, cada lote
+    con su propia semilla derivada de `seed`, y se evalúan en `workers`
+    procesos que leen los datos desde memoria compartida; el resultado es
+    el mismo con cualquier número de procesos. La aceleración del BCa usa
+    el jackknife en forma cerrada de los estadísticos incorporados; el de
+    las funciones propias se reparte en el mismo pool.
+    """
+    data = np.asarray(data, dtype=float)
+    if isinstance(statistic, str):
+        if statistic not in BOOTSTRAP_STATISTICS:
+            raise ValueError(f"Estadístico desconocido: '{statistic}'")
+        statistic, columns = BOOTSTRAP_STATISTICS[statistic]
+        if (data.ndim == 1) != (columns == 1) or (data.ndim == 2 and data.shape[1] != columns):
+            raise ValueError(f"El estadístico requiere datos de {columns} columna(s)")
+    missing = np.isnan(data) if data.ndim == 1 else np.isnan(data).any(axis=1)
+    data = np.ascontiguousarray(data[~missing])
+    n = len(data)
+    if n < 2:
+        raise ValueError("Se necesitan al menos dos observaciones completas")
+
+    observed = float(np.asarray(statistic(data[None, ...]))[0])
+    size = max(1, min(BATCH_SIZE, CHUNK_ELEMENTS // data.size))
+    n_batches = math.ceil(n_resamples / size)
+    seeds = np.random.SeedSequence(seed).spawn(n_batches)
+    sizes = [min(size, n_resamples - i * size) for i in range(n_batches)]
+    workers = workers or _default_workers()
+
+    closed_form = JACKKNIFE.get(statistic)
+    rows = max(1, CHUNK_ELEMENTS // data.size)
+    starts = list(range(0, n, rows))
+    stops = [min(start + rows, n) for start in starts]
+
+    if workers == 1:
+        _use_local(data, statistic)
+        distribution = np.concatenate([_bootstrap_batch(s, k) for s, k in zip(seeds, sizes)])
+        if closed_form is None:
+            theta = np.concatenate([_jackknife_batch(a, b) for a, b in zip(starts, stops)])
+    else:
+        block = shared_memory.SharedMemory(create=True, size=data.nbytes)
+        try:
+            np.ndarray(data.shape, dtype=data.dtype, buffer=block.buf)[...] = data
+            with ProcessPoolExecutor(workers, initializer=_attach,
+                                     initargs=(block.name, data.shape, data.dtype, statistic)) as pool:
+                distribution = np.concatenate(list(pool.map(_bootstrap_batch, seeds, sizes)))
+                if closed_form is None:
+                    theta = np.concatenate(list(pool.map(_jackknife_batch, starts, stops)))
+        finally:
+            block.close()
+            block.unlink()
+    if closed_form is not None:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            theta = closed_form(data)
+
+    alpha = (1 - confidence) / 2
+    percentile = np.nanquantile(distribution, [alpha, 1 - alpha])
+
+    # BCa: corrección de sesgo z0 y aceleración a por jackknife; z0 se
+    # calcula sobre las mismas réplicas finitas que usan los cuantiles
+    finite = distribution[np.isfinite(distribution)]
+    z0 = norm_ppf(np.mean(finite < observed)) if finite.size else np.nan
+    deviation = theta.mean() - theta
+    with np.errstate(divide='ignore', invalid='ignore'):
+        acceleration = (deviation ** 3).sum() / (6 * ((deviation ** 2).sum()) ** 1.5)
+        z = norm_ppf([alpha, 1 - alpha])
+        levels = stats.norm.cdf(z0 + (z0 + z) / (1 - acceleration * (z0 + z)))
+    bca = np.nanquantile(distribution, levels) if np.isfinite(levels).all() else np.full(2, np.nan)
+
+    return {
+        'statistic': observed,
+        'std_error': float(np.nanstd(distribution, ddof=1)),
+        'bias': float(np.nanmean(distribution) - observed),
+        'percentile': tuple(percentile),
+        'basic': (2 * observed - percentile[1], 2 * observed - percentile[0]),
+        'bca': tuple(bca),
+        'n_resamples': len(distribution),
+        'confidence': confidence,
+    }
@@ -0,0 +1,192 @@
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow es opcional: solo lo necesita to_arrow()
+    pa = None
+
+# Bits de la columna flags
+SIGNIFICANT = 1
+INVALID = 2  # estadístico o valor p no definido (NaN)
+
+CORE_COLUMNS = ('test', 'statistic', 'p_value', 'df', 'effect_size', 'flags')
+
+
+class ResultTable:
+    """
+    Resultados de muchas pruebas en arreglos NumPy paralelos.
+
+    Columnas base: test (identificador de la prueba), statistic, p_value,
+    df, effect_size y flags (bits SIGNIFICANT e INVALID); además, columnas
+    adicionales propias de cada prueba (grupos, medias, n...). Las columnas
+    de texto se guardan como códigos enteros más sus categorías, de modo que
+    filtrar, ordenar y convertir a DataFrame o a Arrow no crea un objeto de
+    Python por resultado.
+    """
+
+    def __init__(self, columns):
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("Todas las columnas deben tener la misma longitud")
+        self.columns = {}
+        for name, values in columns.items():
+            if not isinstance(values, pd.Categorical):
+                values = np.asarray(values)
+                if values.dtype == object:
+                    values = pd.Categorical(values)
+            self.columns[name] = values
+
+    @classmethod
+    def from_arrays(cls, test, statistic, p_value, df=None, effect_size=None, alpha=0.05, **extra):
+        """
+        Construir la tabla a partir de los arreglos de cada columna; los
+        flags se calculan a partir de p_value y alpha
+        """
+        statistic = np.asarray(statistic, dtype=float)
+        p_value = np.asarray(p_value, dtype=float)
+        n = len(p_value)
+        columns = {
+            'test': test,
+            'statistic': statistic,
+            'p_value': p_value,
+            'df': np.full(n, np.nan) if df is None else np.asarray(df, dtype=float),
+            'effect_size': np.full(n, np.nan) if effect_size is None else np.asarray(effect_size, dtype=float),
+            'flags': _flags(statistic, p_value, alpha),
+        }
+        columns.update(extra)
+        return cls(columns)
+
+    def __len__(self):
+        return len(self.columns['p_value'])
+
+    def __repr__(self):
+        return f'{type(self).__name__}({len(self)} filas, columnas={list(self.columns)})'
+
+    def __getitem__(self, key):
+        """
+        Nombre de columna → arreglo; máscara booleana o índices → subtabla
+        """
+        if isinstance(key, str):
+            values = self.columns[key]
+            return np.asarray(values) if isinstance(values, pd.Categorical) else values
+        return self.take(key)
+
+    @property
+    def significant(self):
+        return (self.columns['flags'] & SIGNIFICANT) > 0
+
+    def take(self, rows):
+        """
+        Subtabla con las filas indicadas (máscara booleana o posiciones)
+        """
+        rows = np.asarray(rows)
+        if rows.dtype == bool:
+            rows = np.flatnonzero(rows)
+        return type(self)({name: values[rows] for name, values in self.columns.items()})
+
+    def filter(self, mask):
+        return self.take(mask)
+
+    def sort(self, by='p_value', descending=False):
+        """
+        Ordenar por una columna (orden estable; los NaN quedan al final)
+        """
+        values = self.columns[by]
+        keys = (values.codes if isinstance(values, pd.Categorical) else values).astype(float)
+        order = np.argsort(-keys if descending else keys, kind='stable')
+        return self.take(order)
+
+    def head(self, k=10):
+        return self.take(np.arange(min(k, len(self))))
+
+    def with_columns(self, alpha=None, **columns):
+        """
+        Copia con columnas agregadas o reemplazadas; con alpha se recalcula
+        el bit SIGNIFICANT a partir de p_adjusted (si existe) o p_value
+        """
+        table = type(self)({**self.columns, **columns})
+        if alpha is not None:
+            p = table.columns.get('p_adjusted', table.columns['p_value'])
+            table.columns['flags'] = _flags(table.columns['statistic'], p, alpha)
+        return table
+
+    def to_pandas(self):
+        """
+        DataFrame que comparte los arreglos numéricos (sin copiarlos) y una
+        columna booleana 'significant' derivada de los flags
+        """
+        frame = pd.DataFrame(self.columns, copy=False)
+        frame['significant'] = self.significant
+        return frame
+
+    def to_arrow(self):
+        """
+        Tabla Arrow; las columnas numéricas sin valores nulos se envuelven
+        sin copia y las de texto quedan como diccionarios
+        """
+        if pa is None:
+            raise ImportError("Se requiere pyarrow para convertir a Arrow")
+        arrays = {}
+        for name, values in self.columns.items():
+            if isinstance(values, pd.Categorical):
+                arrays[name] = pa.DictionaryArray.from_arrays(
+                    pa.array(values.codes, mask=values.codes < 0),
+                    pa.array(np.asarray(values.categories, dtype=object))
+                )
+            else:
+                arrays[name] = pa.array(values)
+        return pa.table(arrays)
+
+
+class IntervalTable(ResultTable):
+    """
+    Intervalos de confianza en arreglos NumPy paralelos, con la misma
+    representación columnar que ResultTable (texto como códigos, to_pandas
+    y to_arrow sin copiar). Columnas: estimate, lower, upper más las que
+    identifican cada intervalo (method, column, group, confidence, n...).
+    No hay valor p ni flags, así que to_pandas no agrega 'significant'.
+    """
+
+    def __len__(self):
+        return len(self.columns['estimate'])
+
+    def to_pandas(self):
+        return pd.DataFrame(self.columns, copy=False)
+
+
+def constant_label(label, n):
+    """
+    Columna de texto con el mismo valor en las n filas (un solo código)
+    """
+    return pd.Categorical.from_codes(np.zeros(n, dtype=np.int8), [label])
+
+
+def concat(tables):
+    """
+    Unir varias tablas de resultados (del mismo tipo); las columnas que
+    faltan en alguna tabla quedan en NaN
+    """
+    tables = list(tables)
+    names = list(dict.fromkeys(name for table in tables for name in table.columns))
+    columns = {}
+    for name in names:
+        parts = []
+        for table in tables:
+            values = table.columns.get(name)
+            if values is None:
+                values = np.full(len(table), np.nan)
+            parts.append(values)
+        if any(isinstance(part, pd.Categorical) for part in parts):
+            columns[name] = pd.Categorical(pd.concat([pd.Series(part) for part in parts],
+                                                     ignore_index=True))
+        else:
+            columns[name] = np.concatenate(parts)
+    return type(tables[0])(columns)
+
+
+def _flags(statistic, p_value, alpha):
+    flags = np.zeros(len(p_value), dtype=np.uint8)
+    flags[p_value < alpha] |= SIGNIFICANT
+    flags[np.isnan(statistic) | np.isnan(p_value)] |= INVALID
+    return flags
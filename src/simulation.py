@@ -0,0 +1,215 @@
+import hashlib
+import math
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+STATISTICS = ('mean', 'proportion', 'mean_difference', 'proportion_difference')
+
+# Elementos por lote (réplicas × tamaño de muestra) para acotar la memoria
+# de cada matriz de índices
+CHUNK_ELEMENTS = 1 << 22
+REPLICATES = 100_000
+MAX_REPLICATES = 1_000_000
+
+# Simulaciones que se conservan en memoria (cada una guarda sus réplicas en
+# float32: 4 MB por millón)
+CACHE_SIZE = 8
+
+
+def _default_workers():
+    return min(4, os.cpu_count() or 1)
+
+
+class SamplingDistribution:
+    """
+    Distribución muestral simulada de un estadístico: réplicas ordenadas y
+    los parámetros teóricos (valor esperado y error estándar) con los que
+    se compara
+    """
+
+    def __init__(self, statistic, sizes, values, expected, std_error):
+        self.statistic = statistic
+        self.sizes = sizes
+        self.values = np.sort(values)
+        self.expected = expected
+        self.std_error = std_error
+
+    def __len__(self):
+        return len(self.values)
+
+    @property
+    def mean(self):
+        return float(self.values.mean(dtype=np.float64))
+
+    @property
+    def std(self):
+        return float(self.values.std(dtype=np.float64, ddof=1))
+
+    def prob_greater(self, value):
+        """
+        Proporción de réplicas mayores que value
+        """
+        return 1 - np.searchsorted(self.values, value, side='right') / len(self.values)
+
+    def prob_less(self, value):
+        """
+        Proporción de réplicas menores que value
+        """
+        return np.searchsorted(self.values, value, side='left') / len(self.values)
+
+    def quantile(self, q):
+        return np.quantile(self.values, q)
+
+    def histogram(self, bins=60):
+        """
+        Densidad empírica (alturas y bordes) para superponerla a la curva
+        teórica
+        """
+        return np.histogram(self.values, bins=bins, density=True)
+
+
+def _populations(population, statistic):
+    """
+    Lista de poblaciones (una o dos) como arreglos sin NaN
+    """
+    if statistic not in STATISTICS:
+        raise ValueError(f"Estadístico desconocido: '{statistic}'")
+    two = statistic.endswith('_difference')
+    arrays = list(population) if two else [population]
+    if len(arrays) != (2 if two else 1):
+        raise ValueError("Las diferencias requieren dos poblaciones")
+    arrays = [np.asarray(a, dtype=float) for a in arrays]
+    arrays = [a[~np.isnan(a)] for a in arrays]
+    if any(len(a) == 0 for a in arrays):
+        raise ValueError("Cada población debe tener al menos una observación")
+    if statistic.startswith('proportion') and not all(np.isin(a, (0, 1)).all() for a in arrays):
+        raise ValueError("Las proporciones requieren valores 0/1")
+    return arrays
+
+
+def _sample_means(rng, population, n, size):
+    """
+    Medias de `size` muestras con reemplazo de tamaño n, con una matriz de
+    índices de size × n
+    """
+    index = rng.integers(0, len(population), size=(size, n), dtype=np.int32)
+    return population[index].mean(axis=1)
+
+
+def _batch(arrays, statistic, sizes, seed, size):
+    rng = np.random.default_rng(seed)
+    if statistic.startswith('proportion'):
+        # Contar éxitos en n extracciones con reemplazo equivale a una
+        # binomial: no hace falta materializar los índices
+        draws = [rng.binomial(n, a.mean(), size=size) / n for a, n in zip(arrays, sizes)]
+    else:
+        draws = [_sample_means(rng, a, n, size) for a, n in zip(arrays, sizes)]
+    return draws[0] - draws[1] if len(draws) == 2 else draws[0]
+
+
+def _key(arrays, statistic, sizes, replicates, seed):
+    digest = hashlib.blake2b(digest_size=16)
+    for a in arrays:
+        digest.update(np.ascontiguousarray(a).tobytes())
+        digest.update(b'|')
+    return statistic, sizes, replicates, seed, digest.hexdigest()
+
+
+class SimulationCache:
+    """
+    Caché LRU de simulaciones por conjunto de parámetros (poblaciones,
+    estadístico, tamaños, réplicas y semilla), compartida por todas las
+    sesiones del proceso
+    """
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+            return result
+
+    def put(self, key, result):
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+simulation_cache = SimulationCache()
+
+
+def simulate(population, statistic='mean', sizes=30, replicates=REPLICATES, seed=0, workers=None):
+    """
+    Simular por Monte Carlo la distribución muestral de un estadístico,
+    tomando muestras con reemplazo de la población dada (p. ej. la encuesta
+    cargada).
+
+    Con statistic='mean' o 'proportion' `population` es un arreglo y
+    `sizes` el tamaño de muestra; con 'mean_difference' o
+    'proportion_difference' son pares (población 1, población 2) y
+    (n₁, n₂). Las proporciones usan valores 0/1.
+
+    Las réplicas se generan por lotes de matrices de índices, cada lote con
+    su propio generador derivado de `seed` y repartidos en `workers` hilos
+    (el resultado no depende del número de hilos). El resultado se guarda en
+    simulation_cache, de modo que repetir los mismos parámetros no vuelve a
+    simular.
+    """
+    arrays = _populations(population, statistic)
+    sizes = tuple(int(n) for n in np.atleast_1d(sizes))
+    if len(sizes) != len(arrays) or min(sizes) < 1:
+        raise ValueError("Se requiere un tamaño de muestra positivo por población")
+    replicates = int(replicates)
+    if not 1 <= replicates <= MAX_REPLICATES:
+        raise ValueError(f"El número de réplicas debe estar entre 1 y {MAX_REPLICATES}")
+
+    key = _key(arrays, statistic, sizes, replicates, seed)
+    result = simulation_cache.get(key)
+    if result is not None:
+        return result
+
+    size = max(1, CHUNK_ELEMENTS // sum(sizes))
+    n_batches = math.ceil(replicates / size)
+    seeds = np.random.SeedSequence(seed).spawn(n_batches)
+    batch_sizes = [min(size, replicates - i * size) for i in range(n_batches)]
+    workers = workers or _default_workers()
+
+    values = np.empty(replicates, dtype=np.float32)
+    offsets = np.cumsum([0] + batch_sizes)
+
+    def run(i):
+        values[offsets[i]:offsets[i + 1]] = _batch(arrays, statistic, sizes, seeds[i], batch_sizes[i])
+
+    if workers == 1 or n_batches == 1:
+        for i in range(n_batches):
+            run(i)
+    else:
+        with ThreadPoolExecutor(workers) as pool:
+            list(pool.map(run, range(n_batches)))
+
+    # Valores teóricos: muestreo con reemplazo de una población finita, por
+    # lo que la varianza es la poblacional (ddof=0)
+    expected = [a.mean() for a in arrays]
+    variance = [a.var() / n for a, n in zip(arrays, sizes)]
+    result = SamplingDistribution(
+        statistic, sizes, values,
+        expected=float(expected[0] - expected[1] if len(arrays) == 2 else expected[0]),
+        std_error=float(np.sqrt(sum(variance)))
+    )
+    simulation_cache.put(key, result)
+    return result
@@ -0,0 +1,200 @@
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+
+import numpy as np
+
+from src.aggregates import SKETCH_SIZE, CrossProducts, GroupedMoments, MomentStats, QuantileSketch
+from src.encoding import load_codebook
+
+# Afinidades numéricas de SQLite (https://sqlite.org/datatype3.html)
+_NUMERIC_TYPES = ('INT', 'REAL', 'FLOA', 'DOUB', 'NUM', 'DEC')
+
+
+def _quote(name):
+    """
+    Citar un identificador SQL (las columnas tienen espacios y tildes)
+    """
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _value(value, default=np.nan):
+    return default if value is None else value
+
+
+def _codebook_expressions(columns):
+    """
+    Expresiones SQL que derivan las columnas del dataset numérico a partir
+    de las columnas de texto, según el libro de códigos
+    """
+    codebook = load_codebook()
+    expressions = {}
+    for source, target in codebook.numeric_columns.items():
+        if source not in columns or target == source:
+            continue
+        if source in codebook.values:
+            cases = ' '.join(
+                f"WHEN '{str(label).replace(chr(39), chr(39) * 2)}' THEN {float(value)!r}"
+                for label, value in zip(codebook.dtypes[source].categories, codebook.values[source])
+            )
+            expressions[target] = f'CASE {_quote(source)} {cases} END'
+        else:
+            expressions[target] = _quote(source)
+    return expressions
+
+
+class SQLiteSource:
+    """
+    Fuente de datos respaldada por una tabla SQLite de respuestas.
+
+    Implementa la misma interfaz de agregados que SurveyAggregates
+    (moments, cross_products, grouped_moments, describe): los conteos, sumas
+    y sumas de cuadrados se calculan en SQL y a Python solo llegan los
+    resultados agregados. Las columnas del dataset numérico (Genero,
+    Satisfaccion, ...) se derivan en la consulta con el libro de códigos.
+    """
+
+    def __init__(self, path, table='respuestas', expressions=None):
+        self.path = Path(path).resolve()
+        self.table = table
+        info = self._query(f'PRAGMA table_info({_quote(table)})')
+        if not info:
+            raise ValueError(f"La tabla '{table}' no existe en {self.path}")
+        self.types = {row[1]: (row[2] or '').upper() for row in info}
+        self.expressions = {name: _quote(name) for name in self.types}
+        self.expressions.update(
+            _codebook_expressions(self.types) if expressions is None else expressions
+        )
+
+    def _query(self, sql, params=()):
+        # Una conexión de solo lectura por consulta: Streamlit ejecuta cada
+        # sesión en su propio hilo
+        uri = self.path.as_uri() + '?mode=ro'
+        with closing(sqlite3.connect(uri, uri=True)) as con:
+            return con.execute(sql, params).fetchall()
+
+    def _expr(self, column):
+        if column not in self.expressions:
+            raise KeyError(f"La columna '{column}' no existe en la tabla '{self.table}'")
+        return self.expressions[column]
+
+    @property
+    def columns(self):
+        """
+        Columnas numéricas disponibles (de la tabla y derivadas)
+        """
+        numeric = [c for c, t in self.types.items() if any(k in t for k in _NUMERIC_TYPES)]
+        return numeric + [c for c in self.expressions if c not in self.types]
+
+    @property
+    def rows(self):
+        return self._query(f'SELECT COUNT(*) FROM {_quote(self.table)}')[0][0]
+
+    def moments(self, columns=None):
+        columns = list(self.columns if columns is None else columns)
+        k = len(columns)
+        inner = ', '.join(f'{self._expr(c)} AS x{i}' for i, c in enumerate(columns))
+        summary = ', '.join(
+            f'COUNT(x{i}) AS n{i}, AVG(x{i}) AS m{i}, MIN(x{i}) AS lo{i}, MAX(x{i}) AS hi{i}'
+            for i in range(k)
+        )
+        outer = ', '.join(
+            f'MAX(s.n{i}), MAX(s.m{i}), MAX(s.lo{i}), MAX(s.hi{i}), '
+            f'SUM((d.x{i} - s.m{i}) * (d.x{i} - s.m{i})), '
+            f'SUM((d.x{i} - s.m{i}) * (d.x{i} - s.m{i}) * (d.x{i} - s.m{i})), '
+            f'SUM((d.x{i} - s.m{i}) * (d.x{i} - s.m{i}) * (d.x{i} - s.m{i}) * (d.x{i} - s.m{i}))'
+            for i in range(k)
+        )
+        row = self._query(
+            f'WITH d AS (SELECT {inner} FROM {_quote(self.table)}), '
+            f's AS (SELECT {summary} FROM d) '
+            f'SELECT {outer} FROM d CROSS JOIN s'
+        )[0]
+        values = np.array([_value(v) for v in row], dtype=float).reshape(k, 7)
+        n = np.nan_to_num(values[:, 0]).astype(np.int64)
+        sketches = [self._sketch(c, lo, hi) for c, lo, hi in zip(columns, values[:, 2], values[:, 3])]
+        return MomentStats(columns, n, np.nan_to_num(values[:, 1]), np.nan_to_num(values[:, 4]),
+                           values[:, 2], values[:, 3], np.nan_to_num(values[:, 5]),
+                           np.nan_to_num(values[:, 6]), sketches)
+
+    def _sketch(self, column, lo, hi):
+        """
+        Resumen de cuantiles de una columna: conteos por valor calculados en
+        SQL si hay pocos valores distintos; si no, SKETCH_SIZE intervalos de
+        igual ancho resumidos por su media y su conteo
+        """
+        expr = self._expr(column)
+        table = _quote(self.table)
+        rows = self._query(
+            f'SELECT {expr} AS _valor, COUNT(*) FROM {table} WHERE {expr} IS NOT NULL '
+            f'GROUP BY _valor ORDER BY _valor LIMIT ?', (SKETCH_SIZE + 1,)
+        )
+        if len(rows) <= SKETCH_SIZE:
+            return QuantileSketch([r[0] for r in rows], [r[1] for r in rows])
+        width = (hi - lo) / SKETCH_SIZE
+        rows = self._query(
+            f'SELECT MIN(CAST(({expr} - ?) / ? AS INTEGER), ?) AS _intervalo, SUM({expr}), COUNT(*) '
+            f'FROM {table} WHERE {expr} IS NOT NULL GROUP BY _intervalo ORDER BY _intervalo',
+            (lo, width, SKETCH_SIZE - 1)
+        )
+        sums = np.array([r[1] for r in rows], dtype=float)
+        counts = np.array([r[2] for r in rows], dtype=np.int64)
+        return QuantileSketch(sums / counts, counts, exact=False)
+
+    def cross_products(self, columns=None):
+        columns = list(self.columns if columns is None else columns)
+        k = len(columns)
+        inner = ', '.join(f'{self._expr(c)} AS x{i}' for i, c in enumerate(columns))
+        complete = ' AND '.join(f'x{i} IS NOT NULL' for i in range(k))
+        means = ', '.join(f'AVG(x{i}) AS m{i}' for i in range(k))
+        pairs = [(i, j) for i in range(k) for j in range(i, k)]
+        outer = ', '.join(
+            ['MAX(s.n)'] + [f'MAX(s.m{i})' for i in range(k)] +
+            [f'SUM((d.x{i} - s.m{i}) * (d.x{j} - s.m{j}))' for i, j in pairs]
+        )
+        row = self._query(
+            f'WITH d AS (SELECT * FROM (SELECT {inner} FROM {_quote(self.table)}) WHERE {complete}), '
+            f's AS (SELECT COUNT(*) AS n, {means} FROM d) '
+            f'SELECT {outer} FROM d CROSS JOIN s'
+        )[0]
+        n = int(_value(row[0], 0))
+        mean = np.array([_value(v, 0.0) for v in row[1:k + 1]], dtype=float)
+        comoment = np.zeros((k, k))
+        for (i, j), value in zip(pairs, row[k + 1:]):
+            comoment[i, j] = comoment[j, i] = _value(value, 0.0)
+        return CrossProducts(columns, n, mean, comoment)
+
+    def grouped_moments(self, columns, by):
+        columns = list(self.columns if columns is None else columns)
+        k = len(columns)
+        group = self._expr(by)
+        inner = ', '.join(f'{self._expr(c)} AS x{i}' for i, c in enumerate(columns))
+        summary = ', '.join(f'COUNT(x{i}) AS n{i}, AVG(x{i}) AS m{i}' for i in range(k))
+        outer = ', '.join(
+            f'MAX(s.n{i}), MAX(s.m{i}), SUM((d.x{i} - s.m{i}) * (d.x{i} - s.m{i}))'
+            for i in range(k)
+        )
+        rows = self._query(
+            f'WITH d AS (SELECT {group} AS g, {inner} FROM {_quote(self.table)} '
+            f'WHERE {group} IS NOT NULL), '
+            f's AS (SELECT g, {summary} FROM d GROUP BY g) '
+            f'SELECT s.g, {outer} FROM d JOIN s ON d.g = s.g GROUP BY s.g ORDER BY s.g'
+        )
+        levels = [row[0] for row in rows]
+        values = np.array([[_value(v, 0.0) for v in row[1:]] for row in rows],
+                          dtype=float).reshape(len(rows), k, 3)
+        return GroupedMoments(by, levels, columns, values[:, :, 0].astype(np.int64),
+                              values[:, :, 1], values[:, :, 2])
+
+    def describe(self, columns=None):
+        return self.moments(columns).to_frame()
+
+
+def write_sqlite(frame, path, table='respuestas'):
+    """
+    Guardar un DataFrame de respuestas como tabla SQLite (reemplazándola)
+    """
+    with closing(sqlite3.connect(str(path))) as con:
+        frame.to_sql(table, con, if_exists='replace', index=False)
+        con.commit()
+    return SQLiteSource(path, table)